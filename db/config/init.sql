@@ -9,3 +9,46 @@ CREATE TABLE predictions (
 
 CREATE INDEX idx_predictions_timestamp ON predictions(timestamp);
 CREATE INDEX idx_predictions_predicted_digit ON predictions(predicted_digit);
+
+-- Hourly rollup of predictions per (predicted digit, true label), so
+-- accuracy and confusion-matrix views scan O(buckets) rather than O(rows).
+CREATE TABLE predictions_hourly (
+    hour TIMESTAMP NOT NULL,
+    predicted_digit SMALLINT NOT NULL,
+    true_label SMALLINT NOT NULL,
+    prediction_count BIGINT NOT NULL DEFAULT 0,
+    correct_count BIGINT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, predicted_digit, true_label)
+);
+
+-- Maintained per INSERT statement from its transition table, so a batched
+-- multi-row INSERT or COPY costs one upsert per touched bucket.
+CREATE FUNCTION rollup_predictions() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO predictions_hourly AS rollup (
+        hour, predicted_digit, true_label,
+        prediction_count, correct_count, confidence_sum
+    )
+    SELECT
+        date_trunc('hour', COALESCE(timestamp, CURRENT_TIMESTAMP)),
+        predicted_digit,
+        true_label,
+        count(*),
+        count(*) FILTER (WHERE predicted_digit = true_label),
+        sum(confidence_score)
+    FROM inserted
+    GROUP BY 1, 2, 3
+    ON CONFLICT (hour, predicted_digit, true_label) DO UPDATE SET
+        prediction_count = rollup.prediction_count
+            + EXCLUDED.prediction_count,
+        correct_count = rollup.correct_count + EXCLUDED.correct_count,
+        confidence_sum = rollup.confidence_sum + EXCLUDED.confidence_sum;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER predictions_rollup
+AFTER INSERT ON predictions
+REFERENCING NEW TABLE AS inserted
+FOR EACH STATEMENT EXECUTE FUNCTION rollup_predictions();
@@ -0,0 +1,65 @@
+-- Add the hourly predictions rollup to a database initialised before it
+-- existed, and rebuild it from the predictions table. Safe to run more
+-- than once: the rollup is recomputed from scratch on every run.
+BEGIN;
+
+-- Hold off new predictions until the trigger is in place, so no row is
+-- missed or counted twice by the backfill
+LOCK TABLE predictions IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS predictions_hourly (
+    hour TIMESTAMP NOT NULL,
+    predicted_digit SMALLINT NOT NULL,
+    true_label SMALLINT NOT NULL,
+    prediction_count BIGINT NOT NULL DEFAULT 0,
+    correct_count BIGINT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (hour, predicted_digit, true_label)
+);
+
+CREATE OR REPLACE FUNCTION rollup_predictions() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO predictions_hourly AS rollup (
+        hour, predicted_digit, true_label,
+        prediction_count, correct_count, confidence_sum
+    )
+    SELECT
+        date_trunc('hour', COALESCE(timestamp, CURRENT_TIMESTAMP)),
+        predicted_digit,
+        true_label,
+        count(*),
+        count(*) FILTER (WHERE predicted_digit = true_label),
+        sum(confidence_score)
+    FROM inserted
+    GROUP BY 1, 2, 3
+    ON CONFLICT (hour, predicted_digit, true_label) DO UPDATE SET
+        prediction_count = rollup.prediction_count
+            + EXCLUDED.prediction_count,
+        correct_count = rollup.correct_count + EXCLUDED.correct_count,
+        confidence_sum = rollup.confidence_sum + EXCLUDED.confidence_sum;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER predictions_rollup
+AFTER INSERT ON predictions
+REFERENCING NEW TABLE AS inserted
+FOR EACH STATEMENT EXECUTE FUNCTION rollup_predictions();
+
+-- Backfill from the rows logged so far
+TRUNCATE predictions_hourly;
+INSERT INTO predictions_hourly (
+    hour, predicted_digit, true_label,
+    prediction_count, correct_count, confidence_sum
+)
+SELECT
+    date_trunc('hour', COALESCE(timestamp, CURRENT_TIMESTAMP)),
+    predicted_digit,
+    true_label,
+    count(*),
+    count(*) FILTER (WHERE predicted_digit = true_label),
+    sum(confidence_score)
+FROM predictions
+GROUP BY 1, 2, 3;
+
+COMMIT;
@@ -0,0 +1,302 @@
+"""
+Load test the prediction endpoints and report throughput and latency
+percentiles.
+
+The app can be driven in-process through an ASGI transport, against a
+local uvicorn started by the benchmark, or against an already running
+server. Every request carries distinct images so the prediction cache
+does not short-circuit the model.
+
+Run from the model_service directory:
+    python -m benchmarks.load_benchmark --target inprocess \\
+        --concurrency 16 --requests 2000 --batch-sizes 1 8 \\
+        --mix png=1,jpeg=1,base64=1,data_uri=1 --output load.json
+    python -m benchmarks.load_benchmark --target uvicorn --workers 2 \\
+        --compare load.json
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+import httpx
+from benchmarks.payloads import PAYLOAD_KINDS, build_request, parse_mix
+from benchmarks.results import compare_results, save_results, summarise
+
+READY_TIMEOUT_S = 120
+
+
+async def wait_until_ready(client: httpx.AsyncClient):
+    deadline = time.perf_counter() + READY_TIMEOUT_S
+    while time.perf_counter() < deadline:
+        with contextlib.suppress(httpx.TransportError):
+            response = await client.get("/health/ready")
+            if response.status_code == 200:
+                return
+            if response.json().get("status") == "failed":
+                break
+        await asyncio.sleep(0.2)
+    raise RuntimeError(
+        "Model service did not become ready. Train and export a model "
+        "first (python -m src.train, python -m src.export).")
+
+
+@contextlib.asynccontextmanager
+async def inprocess_client():
+    """
+    Run the app's lifespan in this process and talk to it over ASGI.
+    Falls back to an untrained model when no export is available, which
+    keeps latencies representative even though predictions are not.
+    """
+    from src.app import app
+
+    async with app.router.lifespan_context(app):
+        while app.state.model is None and "error" not in app.state.startup:
+            await asyncio.sleep(0.05)
+        if app.state.model is None:
+            from src.model import MNISTCNN
+            from src.utils.model_loader import TorchBackend
+
+            print("No exported model found, benchmarking an untrained one")
+            app.state.model = TorchBackend(MNISTCNN().eval())
+            app.state.model_version = "untrained"
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+                transport=transport, base_url="http://inprocess") as client:
+            yield client
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(workers: int, concurrency: int):
+    """
+    Start uvicorn on a free local port and talk to it over HTTP.
+    """
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    try:
+        async with http_client(f"http://127.0.0.1:{port}",
+                               concurrency) as client:
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+@contextlib.asynccontextmanager
+async def http_client(url: str, concurrency: int):
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+            base_url=url, limits=limits, timeout=30) as client:
+        await wait_until_ready(client)
+        yield client
+
+
+def build_requests(
+        weights: Dict[str, float],
+        batch_size: int,
+        count: int,
+        seed: int
+) -> List[Dict[str, Any]]:
+    """
+    Pre-build `count` requests of distinct images, drawing payload kinds
+    by weight, so encoding never competes with the server for CPU.
+    """
+    rng = random.Random(seed)
+    kinds = rng.choices(list(weights), list(weights.values()), k=count)
+    requests = []
+    for i, kind in enumerate(kinds):
+        path, arguments = build_request(kind, batch_size, seed=seed + i)
+        requests.append({"kind": kind, "path": path, "arguments": arguments})
+    return requests
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        name: str,
+        warmup: List[Dict[str, Any]],
+        requests: List[Dict[str, Any]],
+        batch_size: int,
+        concurrency: int
+) -> Dict[str, Any]:
+    """
+    Send the `warmup` requests, then time `requests` at the given
+    concurrency. The two lists should hold different images, so the timed
+    requests are never answered from the prediction cache.
+    """
+    for request in warmup:
+        await client.post(request["path"], **request["arguments"])
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Counter = Counter()
+    pending = iter(requests)
+
+    async def worker():
+        for request in pending:
+            start = time.perf_counter()
+            response = await client.post(
+                request["path"], **request["arguments"])
+            elapsed = time.perf_counter() - start
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies[request["kind"]].append(elapsed)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    succeeded = [t for kind in latencies.values() for t in kind]
+    return {
+        "name": name,
+        "batch_size": batch_size,
+        "requests": len(requests),
+        "elapsed_s": elapsed,
+        "requests_per_s": len(succeeded) / elapsed,
+        "images_per_s": len(succeeded) * batch_size / elapsed,
+        "status_counts": {str(k): v for k, v in sorted(statuses.items())},
+        **summarise(succeeded),
+        "by_kind": {
+            kind: summarise(times) for kind, times in sorted(latencies.items())
+        },
+    }
+
+
+def print_scenario(result: Dict[str, Any]):
+    print(f"{result['name']:<32} {result['requests_per_s']:>9.1f} req/s "
+          f"{result['images_per_s']:>9.1f} img/s  "
+          f"p50 {result.get('p50_ms', 0):>7.2f}  "
+          f"p95 {result.get('p95_ms', 0):>7.2f}  "
+          f"p99 {result.get('p99_ms', 0):>7.2f} ms  "
+          f"status {result['status_counts']}")
+    for kind, summary in result["by_kind"].items():
+        print(f"  {kind:<30} p50 {summary['p50_ms']:>7.2f}  "
+              f"p95 {summary['p95_ms']:>7.2f}  "
+              f"p99 {summary['p99_ms']:>7.2f} ms")
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    if args.target == "inprocess":
+        client_context = inprocess_client()
+    elif args.target == "uvicorn":
+        client_context = uvicorn_client(args.workers, args.concurrency)
+    else:
+        client_context = http_client(args.url, args.concurrency)
+
+    weights = parse_mix(args.mix)
+    scenarios = []
+    async with client_context as client:
+        for batch_size in args.batch_sizes:
+            requests = build_requests(
+                weights, batch_size, args.requests + args.warmup,
+                seed=batch_size * 1_000_003)
+            name = f"{args.target}/c{args.concurrency}/batch{batch_size}"
+            result = await run_scenario(
+                client, name, requests[:args.warmup],
+                requests[args.warmup:], batch_size, args.concurrency)
+            print_scenario(result)
+            scenarios.append(result)
+    return scenarios
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Load test the model service prediction endpoints"
+    )
+    parser.add_argument(
+        '--target',
+        choices=["inprocess", "uvicorn", "url"],
+        default="inprocess",
+        help='Drive the app in-process, via a local uvicorn, or at --url'
+    )
+    parser.add_argument(
+        '--url',
+        type=str,
+        default="http://127.0.0.1:8000",
+        help='Base URL of a running service for --target url'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='uvicorn worker processes for --target uvicorn'
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=16,
+        help='Concurrent in-flight requests'
+    )
+    parser.add_argument(
+        '--requests',
+        type=int,
+        default=1000,
+        help='Timed requests per batch size'
+    )
+    parser.add_argument(
+        '--warmup',
+        type=int,
+        default=50,
+        help='Untimed warm-up requests per batch size'
+    )
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1],
+        help='Images per request; 1 uses /predict, more /predict/batch'
+    )
+    parser.add_argument(
+        '--mix',
+        type=str,
+        default="png=1,jpeg=1,base64=1,data_uri=1",
+        help=f'Weighted payload mix of {", ".join(PAYLOAD_KINDS)}'
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Write results to this JSON file'
+    )
+    parser.add_argument(
+        '--compare',
+        type=str,
+        help='Baseline JSON results to check for regressions'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='Relative change counted as a regression by --compare'
+    )
+    args = parser.parse_args(argv)
+
+    scenarios = asyncio.run(run(args))
+    if args.output:
+        save_results(args.output, "load", vars(args), scenarios)
+    if args.compare:
+        regressions = compare_results(
+            args.compare, scenarios, args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s) against "
+                     f"{args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Time the request pipeline's building blocks on their own:
+validate_image_data, preprocess_image and the model forward pass.
+
+Run from the model_service directory:
+    python -m benchmarks.micro_benchmark --batch-sizes 1 8 32 \\
+        --output micro.json --compare micro_baseline.json
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from benchmarks.payloads import encode, encode_image_data, make_pixels
+from benchmarks.results import compare_results, save_results, summarise
+from src.config import settings
+from src.utils.image_processing import preprocess_image
+from src.utils.model_loader import InferenceBackend, load_backend
+from src.utils.validation import validate_image_data
+
+
+def time_calls(
+        name: str,
+        fn: Callable[[Any], Any],
+        inputs: List[Any],
+        iterations: int,
+        images_per_call: int = 1
+) -> Dict[str, Any]:
+    """
+    Call `fn` on each input in turn for `iterations` calls after a short
+    warm-up, timing every call individually.
+    """
+    for value in inputs[:10]:
+        fn(value)
+    latencies = []
+    for i in range(iterations):
+        value = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(value)
+        latencies.append(time.perf_counter() - start)
+    summary = summarise(latencies)
+    return {
+        "name": name,
+        "calls": iterations,
+        "us_per_image": summary["mean_ms"] * 1000 / images_per_call,
+        **summary,
+    }
+
+
+def serving_backend() -> InferenceBackend:
+    """
+    The configured serving model, or an untrained one if none is exported.
+    """
+    if os.path.exists(settings.serving_model_path):
+        return load_backend(
+            settings.serving_model_path, settings.inference_backend)
+    from src.model import MNISTCNN
+    from src.utils.model_loader import TorchBackend
+
+    print("No exported model found, benchmarking an untrained one")
+    return TorchBackend(MNISTCNN().eval())
+
+
+def run(args) -> List[Dict[str, Any]]:
+    pixels = make_pixels(64)
+    scenarios = []
+
+    for kind in ("png", "jpeg", "base64", "data_uri"):
+        image_data = [encode_image_data(p, kind) for p in pixels]
+        scenarios.append(time_calls(
+            f"validate_image_data/{kind}", validate_image_data,
+            image_data, args.iterations))
+
+    encoded = {
+        "png": [encode(p, "PNG") for p in pixels],
+        "jpeg": [encode(p, "JPEG") for p in pixels],
+        "raw": [p.tobytes() for p in pixels],
+    }
+    for kind, payloads in encoded.items():
+        scenarios.append(time_calls(
+            f"preprocess_image/{kind}", preprocess_image,
+            payloads, args.iterations))
+
+    backend = serving_backend()
+    for batch_size in args.batch_sizes:
+        batch = np.stack([
+            preprocess_image(p.tobytes())
+            for p in make_pixels(batch_size, seed=batch_size)
+        ])
+        scenarios.append(time_calls(
+            f"forward/{backend.name}/batch{batch_size}", backend.predict,
+            [batch], max(10, args.iterations // batch_size), batch_size))
+
+    for result in scenarios:
+        print(f"{result['name']:<36} {result['us_per_image']:>9.1f} us/image  "
+              f"p50 {result['p50_ms']:>8.3f}  p95 {result['p95_ms']:>8.3f}  "
+              f"p99 {result['p99_ms']:>8.3f} ms")
+    return scenarios
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Microbenchmark validation, preprocessing and forward"
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=2000,
+        help='Timed calls per benchmark'
+    )
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 8, 32],
+        help='Batch sizes for the forward pass'
+    )
+    parser.add_argument(
+        '--output',
+        type=str,
+        help='Write results to this JSON file'
+    )
+    parser.add_argument(
+        '--compare',
+        type=str,
+        help='Baseline JSON results to check for regressions'
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.1,
+        help='Relative change counted as a regression by --compare'
+    )
+    args = parser.parse_args(argv)
+
+    scenarios = run(args)
+    if args.output:
+        save_results(args.output, "micro", vars(args), scenarios)
+    if args.compare:
+        regressions = compare_results(
+            args.compare, scenarios, args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s) against "
+                     f"{args.compare}")
+
+
+if __name__ == "__main__":
+    main()
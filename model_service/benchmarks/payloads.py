@@ -0,0 +1,82 @@
+"""
+Request payloads for the benchmarks: the same random digits encoded as
+PNG, JPEG, bare base64 raw pixels, PNG data URIs or raw octet-stream.
+"""
+import base64
+import io
+from typing import Dict, List, Tuple
+import numpy as np
+from PIL import Image
+
+PAYLOAD_KINDS = ("png", "jpeg", "base64", "data_uri", "raw")
+
+
+def make_pixels(count: int, seed: int = 0) -> List[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    return [
+        rng.integers(0, 256, size=(28, 28), dtype=np.uint8)
+        for _ in range(count)
+    ]
+
+
+def encode(pixels: np.ndarray, image_format: str) -> bytes:
+    buffered = io.BytesIO()
+    Image.fromarray(pixels, mode="L").save(buffered, format=image_format)
+    return buffered.getvalue()
+
+
+def encode_image_data(pixels: np.ndarray, kind: str) -> str:
+    """
+    Encode one image as a PredictRequest image_data string.
+    """
+    if kind == "png":
+        return base64.b64encode(encode(pixels, "PNG")).decode()
+    if kind == "jpeg":
+        return base64.b64encode(encode(pixels, "JPEG")).decode()
+    if kind == "base64":
+        return base64.b64encode(pixels.tobytes()).decode()
+    if kind == "data_uri":
+        png = base64.b64encode(encode(pixels, "PNG")).decode()
+        return f"data:image/png;base64,{png}"
+    raise ValueError(f"Unknown JSON payload kind: {kind}")
+
+
+def build_request(
+        kind: str,
+        batch_size: int,
+        seed: int = 0
+) -> Tuple[str, Dict]:
+    """
+    Build the path and httpx request arguments for one request of
+    `batch_size` images. A batch size of 1 targets /predict, larger sizes
+    /predict/batch.
+    """
+    pixels = make_pixels(batch_size, seed)
+    path = "/predict" if batch_size == 1 else "/predict/batch"
+    if kind == "raw":
+        return path, {
+            "content": b"".join(p.tobytes() for p in pixels),
+            "headers": {"Content-Type": "application/octet-stream"},
+        }
+    images = [encode_image_data(p, kind) for p in pixels]
+    if batch_size == 1:
+        return path, {"json": {"image_data": images[0]}}
+    return path, {"json": {"images": images}}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """
+    Parse a payload mix such as "png=2,jpeg=1,raw=1" into normalised
+    weights.
+    """
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in PAYLOAD_KINDS:
+            raise ValueError(
+                f"Unknown payload kind {kind!r}, expected one of "
+                f"{', '.join(PAYLOAD_KINDS)}")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    return {kind: weight / total for kind, weight in weights.items()}
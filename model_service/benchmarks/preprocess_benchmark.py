@@ -0,0 +1,99 @@
+"""
+Compare the vectorised preprocessing path against the previous per-image
+PIL + torchvision Compose pipeline.
+
+Run from the model_service directory:
+    python -m benchmarks.preprocess_benchmark --batch-sizes 1 32 256
+"""
+import argparse
+import io
+import time
+import numpy as np
+from PIL import Image, ImageOps
+import torch
+from src.utils.image_processing import decode_image, normalise_batch
+
+
+def legacy_preprocess(image_bytes: bytes) -> torch.Tensor:
+    from torchvision import transforms
+
+    image = Image.open(io.BytesIO(image_bytes)).convert("L")
+    image = ImageOps.invert(image.resize((28, 28)))
+    transform_pipeline = transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize((0.1307,), (0.3081,))
+    ])
+    return transform_pipeline(image)
+
+
+def legacy_batch(payloads):
+    return torch.stack([legacy_preprocess(p) for p in payloads])
+
+
+def vectorised_batch(payloads):
+    return normalise_batch(np.stack([decode_image(p) for p in payloads]))
+
+
+def make_payloads(batch_size: int, source_size: int):
+    rng = np.random.default_rng(0)
+    png, raw = [], []
+    for _ in range(batch_size):
+        pixels = rng.integers(
+            0, 256, size=(source_size, source_size), dtype=np.uint8)
+        buffered = io.BytesIO()
+        Image.fromarray(pixels, mode="L").save(buffered, format="PNG")
+        png.append(buffered.getvalue())
+        raw.append(np.asarray(
+            Image.fromarray(pixels, mode="L").resize((28, 28))).tobytes())
+    return png, raw
+
+
+def time_per_image(fn, payloads, iterations: int) -> float:
+    fn(payloads)  # warm-up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(payloads)
+    elapsed = time.perf_counter() - start
+    return elapsed / (iterations * len(payloads)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark image preprocessing paths"
+    )
+    parser.add_argument(
+        '--batch-sizes',
+        type=int,
+        nargs='+',
+        default=[1, 32, 256],
+        help='Batch sizes to benchmark'
+    )
+    parser.add_argument(
+        '--source-size',
+        type=int,
+        default=28,
+        help='Width and height of the encoded source images'
+    )
+    parser.add_argument(
+        '--iterations',
+        type=int,
+        default=200,
+        help='Timed iterations per batch size'
+    )
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    print(f"{'batch':>6} {'legacy PNG':>12} {'vector PNG':>12} "
+          f"{'vector raw':>12}   (us/image)")
+    for batch_size in args.batch_sizes:
+        png, raw = make_payloads(batch_size, args.source_size)
+        iterations = max(1, args.iterations // batch_size)
+        legacy = time_per_image(legacy_batch, png, iterations)
+        vector_png = time_per_image(vectorised_batch, png, iterations)
+        vector_raw = time_per_image(vectorised_batch, raw, iterations)
+        print(f"{batch_size:>6} {legacy:>12.1f} {vector_png:>12.1f} "
+              f"{vector_raw:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Latency summaries and JSON result files shared by the benchmarks, so runs
+can be compared against a saved baseline to catch regressions.
+"""
+import json
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List, Sequence
+import numpy as np
+
+# Summary fields where a larger value is a regression
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "mean_ms", "us_per_image")
+HIGHER_IS_BETTER = ("requests_per_s", "images_per_s")
+
+
+def summarise(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarise latencies given in seconds as milliseconds.
+    """
+    if not latencies:
+        return {}
+    ms = np.asarray(latencies) * 1000
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(
+        path: str,
+        benchmark: str,
+        config: Dict[str, Any],
+        scenarios: List[Dict[str, Any]]
+):
+    results = {
+        "benchmark": benchmark,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "scenarios": scenarios,
+    }
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {path}")
+
+
+def compare_results(
+        baseline_path: str,
+        scenarios: List[Dict[str, Any]],
+        threshold: float
+) -> List[str]:
+    """
+    Compare scenarios against a saved baseline, matching them by name.
+    Returns a description of every metric that got worse by more than
+    `threshold` (a fraction, e.g. 0.1 for 10%).
+    """
+    with open(baseline_path) as f:
+        baseline = {s["name"]: s for s in json.load(f)["scenarios"]}
+
+    regressions = []
+    if not any(s["name"] in baseline for s in scenarios):
+        print(f"No scenarios in common with {baseline_path}")
+    for scenario in scenarios:
+        before = baseline.get(scenario["name"])
+        if before is None:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            if not before.get(metric) or metric not in scenario:
+                continue
+            change = scenario[metric] / before[metric] - 1
+            worse = (change > threshold if metric in LOWER_IS_BETTER
+                     else change < -threshold)
+            print(f"{scenario['name']:<32} {metric:<16} "
+                  f"{before[metric]:>10.2f} -> {scenario[metric]:>10.2f} "
+                  f"({change:+.1%}){'  REGRESSION' if worse else ''}")
+            if worse:
+                regressions.append(f"{scenario['name']} {metric}")
+    return regressions
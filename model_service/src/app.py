@@ -1,11 +1,23 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import logging
+import time
 from src.config import settings
-from src.utils.model_loader import load_model
-from src.routers import predict
+from src.utils.model_loader import (
+    InferenceBackend,
+    load_backend,
+    model_version,
+    warm_up
+)
+from src.utils.model_registry import ModelRegistry
+from src.utils.batching import MicroBatcher
+from src.utils.executor import InferenceExecutor, configure_torch_threads
+from src.utils.metrics import render_metrics, render_value
+from src.utils.prediction_cache import PredictionCache
+from src.routers import admin, predict
 from src.models.prediction import ErrorResponse
 
 # Configure logging
@@ -14,25 +26,86 @@ logger = logging.getLogger("model_service")
 
 
 def create_app():
-    # Define lifespan event handler
-    @asynccontextmanager
-    async def lifespan(app: FastAPI):
-        # Startup: Load model
-        logger.info("Loading model...")
+    def load_and_warm_up():
+        """
+        Load the serving model and warm it up off the event loop. The model
+        is only published on app.state once warm, so readiness flips in one
+        step and no request ever pays for the first forward passes.
+        """
+        startup = app.state.startup
+        if settings.inference_backend == "torchscript":
+            configure_torch_threads(settings.torch_num_threads)
         try:
-            model = load_model(settings.export_model_path)
-            app.state.model = model
-            logger.info("Model loaded successfully.")
+            start = time.perf_counter()
+            # Set by main.py when workers fork from a parent that already
+            # loaded the model
+            model = app.state.preloaded_model
+            if model is None:
+                model = load_backend(
+                    settings.serving_model_path,
+                    settings.inference_backend,
+                    intra_op_threads=settings.torch_num_threads
+                )
+            model.version = model_version(settings.serving_model_path)
+            startup["load_ms"] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            startup["warmup_ms"] = warm_up(
+                model,
+                settings.warmup_batch_sizes,
+                settings.warmup_iterations
+            )
+            startup["warmup_total_ms"] = (time.perf_counter() - start) * 1000
         except Exception as e:
             logger.error(f"Failed to load model: {e}")
-            app.state.model = None
+            startup["error"] = str(e)
             logger.warning(
                 "API will start but prediction endpoints will be unavailable")
+            return
+
+        publish_model(model)
+        logger.info(
+            f"Model {model.version} loaded in {startup['load_ms']:.0f} ms and "
+            f"warmed up in {startup['warmup_total_ms']:.0f} ms "
+            f"({model.name}).")
+
+    def publish_model(model: InferenceBackend):
+        """
+        Swap in a loaded and warmed model. Requests that already hold the
+        previous model finish on it.
+        """
+        app.state.model = model
+        app.state.model_version = model.version
+        app.state.prediction_cache.activate(model.version)
+        if app.state.registry is not None:
+            app.state.startup = dict(app.state.registry.last_load)
+
+    async def watch_registry():
+        if settings.inference_backend == "torchscript":
+            await asyncio.to_thread(
+                configure_torch_threads, settings.torch_num_threads)
+        await app.state.registry.watch(publish_model)
+
+    # Define lifespan event handler
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Startup: load and warm the model in the background so liveness
+        # probes are answered straight away
+        logger.info("Loading model...")
+        if app.state.registry is not None:
+            loading = asyncio.create_task(watch_registry())
+        else:
+            loading = asyncio.create_task(
+                asyncio.to_thread(load_and_warm_up))
 
         yield
         # Shutdown: Clean up resources
         logger.info("Shutting down application...")
-        # Add any cleanup code here (close connections, etc.)
+        loading.cancel()
+        with suppress(asyncio.CancelledError):
+            await loading
+        app.state.batcher.stop()
+        app.state.executor.shutdown()
 
     app = FastAPI(
         title="Digit Recognition API",
@@ -42,6 +115,36 @@ def create_app():
         lifespan=lifespan
     )
 
+    app.state.model = None
+    app.state.model_version = None
+    app.state.startup = {}
+    app.state.preloaded_model = None
+    app.state.publish_model = publish_model
+    app.state.registry = None
+    if settings.model_registry_dir:
+        app.state.registry = ModelRegistry(
+            settings.model_registry_dir,
+            settings.inference_backend,
+            intra_op_threads=settings.torch_num_threads,
+            warmup_batch_sizes=tuple(settings.warmup_batch_sizes),
+            warmup_iterations=settings.warmup_iterations,
+            poll_seconds=settings.model_registry_poll_seconds
+        )
+    app.state.batcher = MicroBatcher(
+        predict.run_model,
+        max_batch_size=settings.batch_max_size,
+        max_wait_ms=settings.batch_max_wait_ms,
+        max_queue_size=settings.batch_queue_size
+    )
+    app.state.executor = InferenceExecutor(
+        max_workers=settings.inference_workers,
+        max_pending=settings.inference_max_pending
+    )
+    app.state.prediction_cache = PredictionCache(
+        max_entries=settings.prediction_cache_size,
+        ttl_seconds=settings.prediction_cache_ttl_seconds
+    )
+
     # Configure CORS
     origins = ["*"]
     app.add_middleware(
@@ -54,6 +157,7 @@ def create_app():
 
     # Include routers
     app.include_router(predict.router, tags=["prediction"])
+    app.include_router(admin.router, tags=["admin"])
 
     # Global error handling
     async def general_exception_handler(request: Request, exc: Exception):
@@ -106,6 +210,81 @@ def create_app():
         }
     app.get("/health", tags=["health"])(health_check)
 
+    async def liveness():
+        """
+        Liveness probe: the process is up and serving HTTP
+        """
+        return {"status": "alive"}
+    app.get("/health/live", tags=["health"])(liveness)
+
+    async def readiness():
+        """
+        Readiness probe: 200 once the model is loaded and warmed up, 503
+        while it is still starting or if loading failed
+        """
+        startup = app.state.startup
+        if app.state.model is None:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={
+                    "status": "failed" if "error" in startup else "starting",
+                    "startup": startup
+                }
+            )
+        return {
+            "status": "ready",
+            "model_version": app.state.model_version,
+            "backend": app.state.model.name,
+            "startup": startup
+        }
+    app.get("/health/ready", tags=["health"])(readiness)
+
+    async def stats():
+        """
+        Micro-batching and prediction cache statistics
+        """
+        return {
+            "batching": app.state.batcher.stats.snapshot(),
+            "cache": app.state.prediction_cache.stats()
+        }
+    app.get("/stats", tags=["health"])(stats)
+
+    async def metrics():
+        """
+        Prometheus metrics: per-stage latency histograms, request counts by
+        error type, and micro-batching and cache counters
+        """
+        batching = app.state.batcher.stats.snapshot()
+        cache = app.state.prediction_cache.stats()
+        return PlainTextResponse(
+            render_metrics([
+                *render_value(
+                    "model_service_model_ready",
+                    "Whether a warmed model is serving predictions.",
+                    "gauge", int(app.state.model is not None)),
+                *render_value(
+                    "model_service_batches_total",
+                    "Batched forward passes run by the micro-batcher.",
+                    "counter", batching["batches"]),
+                *render_value(
+                    "model_service_batch_items_total",
+                    "Images run through the micro-batcher.",
+                    "counter", batching["items"]),
+                *render_value(
+                    "model_service_cache_hits_total",
+                    "Prediction cache hits.", "counter", cache["hits"]),
+                *render_value(
+                    "model_service_cache_misses_total",
+                    "Prediction cache misses.", "counter", cache["misses"]),
+                *render_value(
+                    "model_service_cache_entries",
+                    "Responses held in the prediction cache.",
+                    "gauge", cache["entries"]),
+            ]),
+            media_type="text/plain; version=0.0.4"
+        )
+    app.get("/metrics", tags=["health"])(metrics)
+
     return app
 
 
@@ -1,4 +1,5 @@
 import os
+from typing import List, Literal
 from pydantic_settings import BaseSettings
 
 
@@ -7,8 +8,77 @@ class Settings(BaseSettings):
         "CHECKPOINTS_DIR", "src/checkpoints/")
     model_path: str = os.environ.get(
         "MODEL_PATH", "model_service/src/best_model.pth")
-    model_path: str = os.environ.get(
+    export_model_path: str = os.environ.get(
         "EXPORT_MODEL_PATH", "src/exported_model.pt")
+    onnx_model_path: str = os.environ.get(
+        "ONNX_MODEL_PATH", "src/exported_model.onnx")
+
+    # Training data pipeline. DataLoader worker processes and their
+    # options apply to the standard torchvision pipeline; the prefetcher
+    # loads and moves this many batches to the device ahead of the step
+    train_num_workers: int = 0
+    train_pin_memory: bool = False
+    train_persistent_workers: bool = False
+    train_prefetch_factor: int = 2
+    train_prefetch_batches: int = 2
+    # CPU training throughput: intra-op and inter-op threads (0 keeps
+    # torch's defaults), channels-last activations, bf16 autocast and
+    # torch.compile of the forward pass and loss
+    train_num_threads: int = 0
+    train_interop_threads: int = 0
+    train_channels_last: bool = False
+    train_bf16: bool = False
+    train_compile: bool = False
+    # Process group backend for multi-process runs under torchrun
+    train_dist_backend: str = "gloo"
+    # Batches per optimizer step, and steps between progress lines (0 only
+    # reports per epoch)
+    train_accumulation_steps: int = 1
+    train_log_interval: int = 0
+
+    # Model runtime used for serving: "torchscript" or "onnxruntime"
+    inference_backend: Literal["torchscript", "onnxruntime"] = "torchscript"
+
+    # HTTP server. With more than one worker, main.py loads the model once
+    # and forks workers that share it
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+
+    # Directory of exported models watched for hot reload; empty serves the
+    # single model at the export path
+    model_registry_dir: str = ""
+    model_registry_poll_seconds: float = 5.0
+    # Required as X-Admin-Token on /admin endpoints, which are disabled
+    # while it is empty
+    admin_token: str = ""
+
+    # Micro-batching of concurrent /predict requests
+    batch_max_size: int = 32
+    batch_max_wait_ms: float = 2.0
+    batch_queue_size: int = 256
+    # Maximum number of images accepted by POST /predict/batch
+    batch_request_max_items: int = 256
+
+    # Thread pool for request preprocessing, off the event loop
+    inference_workers: int = 4
+    inference_max_pending: int = 64
+    # Intra-op threads for forward passes (0 keeps the runtime's default)
+    torch_num_threads: int = 0
+
+    # Warm-up forward passes run at startup before reporting ready
+    warmup_batch_sizes: List[int] = [1, 8, 32]
+    warmup_iterations: int = 3
+
+    # Cache of responses for repeated images (0 entries disables it)
+    prediction_cache_size: int = 10000
+    prediction_cache_ttl_seconds: float = 3600.0
+
+    @property
+    def serving_model_path(self) -> str:
+        if self.inference_backend == "onnxruntime":
+            return self.onnx_model_path
+        return self.export_model_path
 
     class Config:
         env_file = ".env"
@@ -1,16 +1,312 @@
+import os
+import queue
+import threading
+import time
+import numpy as np
+import torch
 from torchvision import datasets, transforms
-from torch.utils.data import DataLoader
+from torch.utils.data import (
+    DataLoader,
+    DistributedSampler,
+    Sampler,
+    TensorDataset
+)
 
+# Mean and std for MNIST
+MNIST_MEAN = 0.1307
+MNIST_STD = 0.3081
 
-def get_data_loaders(batch_size=64, download=True):
+
+def mnist_transform():
+    return transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize((MNIST_MEAN,), (MNIST_STD,))
+    ])
+
+
+class TensorBatchLoader:
+    """
+    Serves (images, targets) batches by slicing whole-dataset tensors, with
+    no per-sample transforms or collation. Iterates like a DataLoader and
+    exposes `dataset` so code using `len(loader.dataset)` works unchanged.
+    A `sampler`, such as a DistributedSampler, picks and orders the
+    samples instead of `shuffle`.
+    """
+
+    def __init__(self, images, targets, batch_size=64, shuffle=False,
+                 pin_memory=False, sampler=None):
+        self.dataset = TensorDataset(images, targets)
+        self.images = images
+        self.targets = targets
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self.sampler = sampler
+
+    def __len__(self):
+        n = len(self.targets) if self.sampler is None else len(self.sampler)
+        return -(-n // self.batch_size)
+
+    def __iter__(self):
+        for data, target in self._batches():
+            if self.pin_memory:
+                data, target = data.pin_memory(), target.pin_memory()
+            yield data, target
+
+    def _batches(self):
+        n = len(self.targets)
+        if self.sampler is not None:
+            order = torch.tensor(list(self.sampler), dtype=torch.long)
+            for start in range(0, len(order), self.batch_size):
+                index = order[start:start + self.batch_size]
+                yield self.images[index], self.targets[index]
+        elif self.shuffle:
+            order = torch.randperm(n)
+            for start in range(0, n, self.batch_size):
+                index = order[start:start + self.batch_size]
+                yield self.images[index], self.targets[index]
+        else:
+            for start in range(0, n, self.batch_size):
+                end = start + self.batch_size
+                yield self.images[start:end], self.targets[start:end]
+
+
+class DevicePrefetcher:
+    """
+    Iterates a loader in a background thread, moving up to `depth` batches
+    to `device` while the caller computes on the current one. With a
+    depth of 0, batches are loaded and moved synchronously instead.
+
+    `wait_seconds` is how long the last pass spent blocked on data, and
+    `batches` how many it yielded.
+    """
+
+    def __init__(self, loader, device, depth=2):
+        self.loader = loader
+        self.dataset = loader.dataset
+        self.sampler = getattr(loader, "sampler", None)
+        self.device = torch.device(device)
+        self.depth = depth
+        self.wait_seconds = 0.0
+        self.batches = 0
+
+    def __len__(self):
+        return len(self.loader)
+
+    def _to_device(self, batch):
+        # Copies from pinned memory can overlap with compute
+        return tuple(t.to(self.device, non_blocking=True) for t in batch)
+
+    def __iter__(self):
+        self.wait_seconds = 0.0
+        self.batches = 0
+        if self.depth <= 0:
+            yield from self._iter_sync()
+        else:
+            yield from self._iter_background()
+
+    def _iter_sync(self):
+        batches = iter(self.loader)
+        while True:
+            start = time.perf_counter()
+            try:
+                batch = self._to_device(next(batches))
+            except StopIteration:
+                return
+            self.wait_seconds += time.perf_counter() - start
+            self.batches += 1
+            yield batch
+
+    def _iter_background(self):
+        ready = queue.Queue(self.depth)
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for batch in self.loader:
+                    item = self._to_device(batch)
+                    while not stop.is_set():
+                        try:
+                            ready.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            pass
+                    if stop.is_set():
+                        return
+                item = done
+            except Exception as e:
+                item = e
+            ready.put(item)
+
+        thread = threading.Thread(
+            target=produce, name="batch-prefetch", daemon=True)
+        thread.start()
+        try:
+            while True:
+                start = time.perf_counter()
+                item = ready.get()
+                self.wait_seconds += time.perf_counter() - start
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                self.batches += 1
+                yield item
+        finally:
+            # Unblock and stop the producer if the caller stopped early
+            stop.set()
+            while thread.is_alive():
+                try:
+                    ready.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+
+
+def tensor_cache_paths(root, train):
+    split = "train" if train else "test"
+    cache_dir = os.path.join(root, "MNIST", "tensor")
+    return (os.path.join(cache_dir, f"{split}-images.npy"),
+            os.path.join(cache_dir, f"{split}-labels.npy"))
+
+
+def build_tensor_cache(root, train, download):
+    """
+    Decode the MNIST IDX files once and write the normalised images, shaped
+    (N, 1, 28, 28) float32, and labels as .npy files.
+    """
+    images_path, labels_path = tensor_cache_paths(root, train)
+    mnist = datasets.MNIST(root=root, train=train, download=download)
+    images = mnist.data.unsqueeze(1).float().div_(255)
+    images.sub_(MNIST_MEAN).div_(MNIST_STD)
+    os.makedirs(os.path.dirname(images_path), exist_ok=True)
+    for path, array in ((images_path, images.numpy()),
+                        (labels_path, mnist.targets.numpy())):
+        # Write then rename, so a partial file is never picked up
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+
+
+def load_tensor_mnist(root='./data', train=True, download=True):
+    """
+    Load a normalised MNIST split as (images, targets) tensors, memory
+    mapping the cached .npy files and building them on first use.
+    """
+    images_path, labels_path = tensor_cache_paths(root, train)
+    if not (os.path.exists(images_path) and os.path.exists(labels_path)):
+        build_tensor_cache(root, train, download)
+    # Copy-on-write maps are writable, so torch can wrap them without
+    # copying; pages are read from disk as batches touch them
+    images = torch.from_numpy(np.load(images_path, mmap_mode='c'))
+    targets = torch.from_numpy(np.load(labels_path))
+    return images, targets
+
+
+def distributed_sampler(dataset, num_replicas, rank, shuffle):
+    """
+    A sampler giving this rank its shard of `dataset`, or None when
+    training in a single process. Call its set_epoch() every epoch so the
+    shards are reshuffled.
+    """
+    if num_replicas <= 1:
+        return None
+    return DistributedSampler(
+        dataset, num_replicas=num_replicas, rank=rank, shuffle=shuffle)
+
+
+class ShardSampler(Sampler):
+    """
+    This rank's contiguous slice of a dataset, in order. Unlike a
+    DistributedSampler, no samples are repeated to even out the shards,
+    so evaluating every shard counts each sample exactly once; shard
+    sizes differ by at most one.
+    """
+
+    def __init__(self, dataset, num_replicas, rank):
+        size = len(dataset)
+        self.start = size * rank // num_replicas
+        self.end = size * (rank + 1) // num_replicas
+
+    def __iter__(self):
+        return iter(range(self.start, self.end))
+
+    def __len__(self):
+        return self.end - self.start
+
+
+def evaluation_sampler(dataset, num_replicas, rank):
+    """
+    A sampler giving this rank its unpadded shard of `dataset` for
+    evaluation, or None when running in a single process.
+    """
+    if num_replicas <= 1:
+        return None
+    return ShardSampler(dataset, num_replicas, rank)
+
+
+def get_tensor_loader(batch_size=64, train=True, download=True,
+                      root='./data', pin_memory=False, num_replicas=1,
+                      rank=0):
+    images, targets = load_tensor_mnist(root, train, download)
+    loader = TensorBatchLoader(images, targets, batch_size=batch_size,
+                               shuffle=train, pin_memory=pin_memory)
+    if train:
+        loader.sampler = distributed_sampler(
+            loader.dataset, num_replicas, rank, shuffle=True)
+    else:
+        loader.sampler = evaluation_sampler(
+            loader.dataset, num_replicas, rank)
+    return loader
+
+
+def loader_options(num_workers=0, pin_memory=False, persistent_workers=False,
+                   prefetch_factor=2):
+    """
+    DataLoader keyword arguments; worker-only options are left out when
+    loading in the main process, where DataLoader rejects them.
+    """
+    options = {
+        "num_workers": num_workers,
+        "pin_memory": pin_memory and torch.cuda.is_available(),
+    }
+    if num_workers > 0:
+        options["persistent_workers"] = persistent_workers
+        options["prefetch_factor"] = prefetch_factor
+    return options
+
+
+def get_data_loaders(batch_size=64, download=True, in_memory=False,
+                     num_workers=0, pin_memory=False,
+                     persistent_workers=False, prefetch_factor=2,
+                     num_replicas=1, rank=0):
     """
     Downloads the MNIST dataset and creates data loaders for training and
     testing. Applies normalisation and necessary transformations.
+
+    With `in_memory`, batches are sliced from pre-normalised tensors
+    cached on disk instead of transforming each sample every epoch; keep
+    the default for runs that add per-sample transforms like augmentation.
+    Worker processes only apply to the standard pipeline.
+
+    With `num_replicas` above 1, each loader only serves the shard of its
+    dataset for `rank`: a DistributedSampler's for training, and an
+    unpadded ShardSampler's for testing so no image is counted twice.
     """
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))  # Mean and std for MNIST
-    ])
+    if in_memory:
+        return (
+            get_tensor_loader(batch_size, train=True, download=download,
+                              pin_memory=pin_memory,
+                              num_replicas=num_replicas, rank=rank),
+            get_tensor_loader(batch_size, train=False, download=download,
+                              pin_memory=pin_memory,
+                              num_replicas=num_replicas, rank=rank),
+        )
+    options = loader_options(
+        num_workers, pin_memory, persistent_workers, prefetch_factor)
+
+    transform = mnist_transform()
 
     train_dataset = datasets.MNIST(
         root='./data',
@@ -26,15 +322,22 @@ def get_data_loaders(batch_size=64, download=True):
         transform=transform
     )
 
+    train_sampler = distributed_sampler(
+        train_dataset, num_replicas, rank, shuffle=True)
     train_loader = DataLoader(
         train_dataset,
         batch_size=batch_size,
-        shuffle=True
+        # A sampler does its own shuffling
+        shuffle=train_sampler is None,
+        sampler=train_sampler,
+        **options
     )
     test_loader = DataLoader(
         test_dataset,
         batch_size=batch_size,
-        shuffle=False
+        shuffle=False,
+        sampler=evaluation_sampler(test_dataset, num_replicas, rank),
+        **options
     )
 
     return train_loader, test_loader
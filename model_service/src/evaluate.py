@@ -1,6 +1,7 @@
 import torch
-from torchvision import datasets, transforms
+from torchvision import datasets
 from torch.utils.data import DataLoader
+from src.data_loader import get_tensor_loader, mnist_transform
 import argparse
 import numpy as np
 from sklearn.metrics import (
@@ -9,20 +10,22 @@ from sklearn.metrics import (
     recall_score,
     confusion_matrix
 )
-from model import MNISTCNN
+from src.model import MNISTCNN
 from src.config import settings
 
+# Minimum test accuracy a model must reach to be deployed
+ACCURACY_THRESHOLD = 0.85
 
-def get_test_loader(batch_size=64, download=True):
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
+
+def get_test_loader(batch_size=64, download=True, in_memory=False):
+    if in_memory:
+        return get_tensor_loader(
+            batch_size, train=False, download=download)
     test_dataset = datasets.MNIST(
         root='./data',
         train=False,
         download=download,
-        transform=transform
+        transform=mnist_transform()
     )
     test_loader = DataLoader(
         test_dataset,
@@ -68,13 +71,19 @@ def main():
         default=64,
         help='Batch size for evaluation'
     )
+    parser.add_argument(
+        '--in-memory',
+        action='store_true',
+        help='Slice batches from a cached pre-normalised tensor dataset'
+    )
     args = parser.parse_args()
 
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     model = MNISTCNN().to(device)
     model.load_state_dict(torch.load(args.checkpoint, map_location=device))
 
-    test_loader = get_test_loader(batch_size=args.batch_size)
+    test_loader = get_test_loader(
+        batch_size=args.batch_size, in_memory=args.in_memory)
 
     acc, prec, rec, cm = evaluate(model, device, test_loader)
 
@@ -84,7 +93,7 @@ def main():
     print("Confusion Matrix:")
     print(cm)
 
-    if acc < 0.85:
+    if acc < ACCURACY_THRESHOLD:
         print("Warning: Model accuracy is below 85%")
     else:
         print("Model meets the accuracy requirement of at least 85%")
@@ -1,34 +1,248 @@
+import copy
+import json
+import os
+import time
+import numpy as np
 import torch
-from torchvision import transforms
+import torch.nn as nn
 import argparse
+from src.data_loader import mnist_transform
 from src.model import MNISTCNN
 from src.config import settings
+from src.utils.model_loader import (
+    VARIANT_FILE,
+    OnnxRuntimeBackend,
+    load_torchscript
+)
+
+EXPORT_MODES = (
+    "script",
+    "frozen",
+    "channels-last",
+    "dynamic-int8",
+    "static-int8",
+    "onnx",
+)
 
 
 def preprocess_input(image):
     """
     Preprocess a raw PIL image into a normalized tensor suitable for inference.
     """
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
     # Add a batch dimension
-    return transform(image).unsqueeze(0)
+    return mnist_transform()(image).unsqueeze(0)
 
 
-def export_model(model_checkpoint, export_path, device):
+class ChannelsLastMNISTCNN(nn.Module):
     """
-    Loads a trained model checkpoint,
-    converts it to TorchScript, and exports it.
+    MNISTCNN with weights and inputs in channels-last (NHWC) memory format,
+    so callers can keep sending ordinary NCHW tensors.
+    """
+
+    def __init__(self, model: MNISTCNN):
+        super(ChannelsLastMNISTCNN, self).__init__()
+        self.model = model.to(memory_format=torch.channels_last)
+
+    def forward(self, x):
+        return self.model(x.contiguous(memory_format=torch.channels_last))
+
+
+class OnnxRuntimeModule:
+    """
+    Torch-callable view of an ONNX Runtime session, so ONNX exports can be
+    evaluated and timed alongside the TorchScript variants.
+    """
+
+    def __init__(self, model_path):
+        self.backend = OnnxRuntimeBackend(model_path)
+
+    def eval(self):
+        return self
+
+    def __call__(self, x):
+        batch = x.detach().cpu().numpy().astype(np.float32)
+        return torch.from_numpy(self.backend.predict(batch))
+
+
+def export_onnx(model, export_path, opset_version=17):
     """
+    Export to ONNX with a dynamic batch axis, for the onnxruntime backend.
+    """
+    torch.onnx.export(
+        model.cpu(),
+        (torch.randn(1, 1, 28, 28),),
+        export_path,
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset_version,
+        dynamo=False
+    )
+
+
+def quantized_engine() -> str:
+    engines = torch.backends.quantized.supported_engines
+    return "x86" if "x86" in engines else "qnnpack"
+
+
+def load_float_model(model_checkpoint, device):
     model = MNISTCNN().to(device)
     model.load_state_dict(torch.load(model_checkpoint, map_location=device))
     model.eval()
-    # Convert the model to TorchScript via scripting for inference
-    scripted_model = torch.jit.script(model)
-    scripted_model.save(export_path)
-    print(f"Model exported to {export_path}")
+    return model
+
+
+def build_variant(model, mode, calibration_loader=None,
+                  calibration_batches=10):
+    """
+    Convert a float MNISTCNN into the TorchScript module for an export mode.
+    Quantized modes run on the CPU; static-int8 needs a calibration loader.
+    """
+    example = torch.randn(1, 1, 28, 28)
+    model = copy.deepcopy(model).eval()
+
+    if mode == "script":
+        return torch.jit.script(model)
+
+    # optimize_for_inference output cannot be reloaded once saved, so frozen
+    # variants are optimised by model_loader at load time instead
+    if mode == "frozen":
+        return torch.jit.freeze(torch.jit.script(model))
+
+    if mode == "channels-last":
+        channels_last = ChannelsLastMNISTCNN(model).eval()
+        return torch.jit.freeze(torch.jit.script(channels_last))
+
+    from torch.ao.quantization import (
+        get_default_qconfig_mapping,
+        quantize_dynamic
+    )
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    torch.backends.quantized.engine = quantized_engine()
+    model = model.cpu()
+    if mode == "dynamic-int8":
+        quantized = quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    elif mode == "static-int8":
+        if calibration_loader is None:
+            raise ValueError("static-int8 export needs calibration data")
+        prepared = prepare_fx(
+            model,
+            get_default_qconfig_mapping(torch.backends.quantized.engine),
+            example_inputs=(example,)
+        )
+        with torch.no_grad():
+            for i, (data, _) in enumerate(calibration_loader):
+                if i >= calibration_batches:
+                    break
+                prepared(data)
+        quantized = convert_fx(prepared)
+    else:
+        raise ValueError(f"Unknown export mode: {mode}")
+
+    with torch.no_grad():
+        traced = torch.jit.trace(quantized, example)
+    return torch.jit.freeze(traced)
+
+
+def save_variant(module, export_path, mode):
+    metadata = {"mode": mode}
+    if mode in ("frozen", "channels-last"):
+        metadata["optimize_for_inference"] = True
+    if mode.endswith("int8"):
+        metadata["quantized_engine"] = torch.backends.quantized.engine
+    torch.jit.save(
+        module, export_path,
+        _extra_files={VARIANT_FILE: json.dumps(metadata)}
+    )
+
+
+def variant_path(export_path, mode):
+    """
+    Where `--mode all` writes each variant: exported_model.pt for the
+    default script mode, exported_model.onnx for onnx and
+    exported_model.<mode>.pt for the others.
+    """
+    root, ext = os.path.splitext(export_path)
+    if mode == "onnx":
+        return f"{root}.onnx"
+    if mode == "script":
+        return export_path
+    return f"{root}.{mode}{ext}"
+
+
+def registry_path(registry_dir, mode):
+    """
+    Timestamped path for publishing an export to a model registry
+    directory, so earlier versions stay available to pin.
+    """
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    export_path = os.path.join(registry_dir, f"exported_model-{stamp}.pt")
+    return variant_path(export_path, mode)
+
+
+def export_model(model_checkpoint, export_path, device, mode="script",
+                 calibration_loader=None):
+    """
+    Loads a trained model checkpoint,
+    converts it to TorchScript in the requested mode, and exports it.
+    """
+    if mode.endswith("int8") or mode == "onnx":
+        device = torch.device("cpu")
+    model = load_float_model(model_checkpoint, device)
+    if mode == "onnx":
+        export_onnx(model, export_path)
+        print(f"Model exported to {export_path} ({mode})")
+        return OnnxRuntimeModule(export_path)
+
+    module = build_variant(model, mode, calibration_loader)
+    save_variant(module, export_path, mode)
+    print(f"Model exported to {export_path} ({mode})")
+    return load_torchscript(export_path)[0]
+
+
+def measure_latency(model, iterations=200, warmup=20):
+    """
+    Mean CPU latency in milliseconds of a single-image forward pass.
+    """
+    example = torch.randn(1, 1, 28, 28)
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(example)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            model(example)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def report_variants(float_model, variants, test_loader):
+    """
+    Print each variant's accuracy delta against the float model and its
+    per-image CPU latency, and return the fastest variant that passes the
+    accuracy gate.
+    """
+    from src.evaluate import ACCURACY_THRESHOLD, evaluate
+
+    cpu = torch.device("cpu")
+    float_model = float_model.to(cpu)
+    float_acc = evaluate(float_model, cpu, test_loader)[0]
+    float_latency = measure_latency(float_model)
+    print(f"{'mode':<14} {'accuracy':>9} {'delta':>8} {'ms/image':>9}  gate")
+    print(f"{'float':<14} {float_acc:>9.4f} {0:>8.4f} {float_latency:>9.3f}")
+
+    best = None
+    for mode, module in variants.items():
+        acc = evaluate(module, cpu, test_loader)[0]
+        latency = measure_latency(module)
+        passed = acc >= ACCURACY_THRESHOLD
+        print(f"{mode:<14} {acc:>9.4f} {acc - float_acc:>+8.4f} "
+              f"{latency:>9.3f}  {'pass' if passed else 'FAIL'}")
+        if passed and (best is None or latency < best[1]):
+            best = (mode, latency)
+
+    if best is not None:
+        print(f"Fastest variant passing the gate: {best[0]}")
+    return best[0] if best else None
 
 
 def main():
@@ -47,10 +261,69 @@ def main():
         default=settings.export_model_path,
         help='Path to save the exported model'
     )
+    parser.add_argument(
+        '--mode',
+        type=str,
+        choices=EXPORT_MODES + ("all",),
+        default="script",
+        help='Export variant; "all" writes every variant next to '
+             '--export-path'
+    )
+    parser.add_argument(
+        '--registry-dir',
+        type=str,
+        help='Publish to this model registry directory (MODEL_REGISTRY_DIR) '
+             'instead of --export-path, for a running service to hot reload'
+    )
+    parser.add_argument(
+        '--report',
+        action='store_true',
+        help='Report accuracy delta and CPU latency against the float model'
+    )
     args = parser.parse_args()
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    export_model(args.checkpoint, args.export_path, device)
+    # The report evaluates and times the variants on CPU, so export them
+    # there rather than to a GPU
+    device = torch.device(
+        "cuda" if torch.cuda.is_available() and not args.report else "cpu")
+    modes = EXPORT_MODES if args.mode == "all" else (args.mode,)
+
+    calibration_loader = test_loader = None
+    if "static-int8" in modes or args.report:
+        from src.data_loader import get_data_loaders
+        calibration_loader, test_loader = get_data_loaders(batch_size=64)
+
+    if args.registry_dir:
+        os.makedirs(args.registry_dir, exist_ok=True)
+
+    variants = {}
+    for mode in modes:
+        if args.registry_dir:
+            export_path = registry_path(args.registry_dir, mode)
+        elif args.mode == "all":
+            export_path = variant_path(args.export_path, mode)
+        elif mode == "onnx" and args.export_path.endswith(".pt"):
+            export_path = settings.onnx_model_path
+        else:
+            export_path = args.export_path
+
+        if args.registry_dir:
+            # Write under a hidden name and rename, so the registry never
+            # sees a partially written file
+            directory, name = os.path.split(export_path)
+            staging_path = os.path.join(directory, f".{name}")
+            variants[mode] = export_model(
+                args.checkpoint, staging_path, device, mode,
+                calibration_loader)
+            os.replace(staging_path, export_path)
+        else:
+            variants[mode] = export_model(
+                args.checkpoint, export_path, device, mode,
+                calibration_loader)
+
+    if args.report:
+        float_model = load_float_model(args.checkpoint, torch.device("cpu"))
+        report_variants(float_model, variants, test_loader)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,50 @@
+import logging
 import uvicorn
 from src.app import app
+from src.config import settings
+from src.utils.model_loader import load_backend
+from src.utils.prefork import PreforkServer, threads_per_worker
+
+logger = logging.getLogger("model_service")
+
+
+def preload_model():
+    """
+    Load the TorchScript model in the parent process so forked workers
+    share its weights instead of each loading a copy. ONNX Runtime
+    sessions own thread pools that do not survive a fork, so that backend
+    loads in each worker, as do models served from the registry.
+    """
+    if (settings.inference_backend != "torchscript" or
+            settings.model_registry_dir):
+        return
+    try:
+        model = load_backend(settings.serving_model_path)
+    except Exception as e:
+        logger.warning(f"Could not preload model, workers will retry: {e}")
+        return
+    # Move parameters into shared memory so they are never copied on write
+    model.model.share_memory()
+    app.state.preloaded_model = model
+
+
+def configure_worker(index: int):
+    settings.torch_num_threads = threads_per_worker(
+        settings.workers, settings.torch_num_threads)
+    logger.info(
+        f"Worker {index} using {settings.torch_num_threads} intra-op threads")
 
 
 def main():
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    config = uvicorn.Config(app, host=settings.host, port=settings.port)
+    if settings.workers <= 1:
+        uvicorn.Server(config).run()
+        return
+
+    preload_model()
+    PreforkServer(
+        config, settings.workers, on_worker_start=configure_worker
+    ).run()
 
 
 if __name__ == "__main__":
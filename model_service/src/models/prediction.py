@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Literal
+from typing import Dict, List, Literal, Optional
 
 
 class PredictRequest(BaseModel):
@@ -24,6 +24,10 @@ class PredictResponse(BaseModel):
         ...,
         description="Confidence scores for each possible digit"
     )
+    model_version: Optional[str] = Field(
+        None,
+        description="Version of the model that made the prediction"
+    )
 
     class Config:
         schema_extra = {
@@ -40,7 +44,8 @@ class PredictResponse(BaseModel):
                     "7": 0.02,
                     "8": 0.02,
                     "9": 0.01
-                }
+                },
+                "model_version": "3f2a9c1b7d4e"
             }
         }
 
@@ -48,4 +53,63 @@ class PredictResponse(BaseModel):
 class ErrorResponse(BaseModel):
     detail: str
     error_type: Literal["model_error", "validation_error",
-                        "processing_error", "server_error"] = "server_error"
+                        "processing_error", "auth_error",
+                        "server_error"] = "server_error"
+
+
+class BatchPredictRequest(BaseModel):
+    images: List[str] = Field(
+        ...,
+        description="Base64 encoded image strings, raw or data URI format",
+        min_length=1
+    )
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "images": [
+                    "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAA...",
+                    "iVBORw0KGgoAAAANSUhEUgAA..."
+                ]
+            }
+        }
+
+
+class BatchPredictItem(BaseModel):
+    index: int = Field(..., description="Position of the image in the request")
+    result: Optional[PredictResponse] = Field(
+        None,
+        description="Prediction for the image, if it could be processed"
+    )
+    error: Optional[ErrorResponse] = Field(
+        None,
+        description="Why the image could not be processed, if it failed"
+    )
+
+
+class BatchPredictResponse(BaseModel):
+    results: List[BatchPredictItem] = Field(
+        ...,
+        description="One entry per submitted image, in request order"
+    )
+
+
+class ModelVersion(BaseModel):
+    version: str = Field(..., description="Content hash of the export")
+    path: str
+    modified: float = Field(..., description="File modification time")
+    active: bool = Field(..., description="Whether it is being served")
+    pinned: bool
+    error: Optional[str] = Field(
+        None,
+        description="Why the version failed to load, if it did"
+    )
+
+
+class ModelListResponse(BaseModel):
+    active_version: Optional[str]
+    pinned_version: Optional[str]
+    models: List[ModelVersion] = Field(
+        ...,
+        description="Exported models in the registry, newest first"
+    )
@@ -0,0 +1,139 @@
+import asyncio
+import hmac
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from src.config import settings
+from src.models.prediction import (
+    ErrorResponse,
+    ModelListResponse,
+    ModelVersion
+)
+from src.utils.model_registry import ModelRegistry
+from typing import Optional
+
+router = APIRouter(
+    prefix="/admin",
+    responses={
+        status.HTTP_401_UNAUTHORIZED: {"model": ErrorResponse},
+        status.HTTP_403_FORBIDDEN: {"model": ErrorResponse},
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponse},
+        status.HTTP_409_CONFLICT: {"model": ErrorResponse},
+    }
+)
+
+
+async def check_admin_token(
+    x_admin_token: Optional[str] = Header(default=None)
+):
+    """
+    Dependency requiring the X-Admin-Token header to match ADMIN_TOKEN.
+    Without ADMIN_TOKEN set, the admin endpoints are disabled.
+    """
+    if not settings.admin_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin endpoints are disabled. Set ADMIN_TOKEN to "
+                   "enable them.",
+            headers={"X-Error-Type": "auth_error"}
+        )
+    if x_admin_token is None or not hmac.compare_digest(
+            x_admin_token.encode(), settings.admin_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or missing admin token",
+            headers={"X-Error-Type": "auth_error"}
+        )
+
+
+async def get_registry(request: Request) -> ModelRegistry:
+    """
+    Dependency to retrieve the model registry from app state
+    """
+    registry = request.app.state.registry
+    if registry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model registry is not enabled. Set MODEL_REGISTRY_DIR "
+                   "to serve models from a watched directory."
+        )
+    return registry
+
+
+async def describe(registry: ModelRegistry):
+    # Scanning stats and may hash model files, so keep it off the loop
+    return await asyncio.to_thread(registry.describe)
+
+
+async def list_models(request: Request, registry: ModelRegistry):
+    return ModelListResponse(
+        active_version=request.app.state.model_version,
+        pinned_version=registry.pinned,
+        models=[ModelVersion(**m) for m in await describe(registry)]
+    )
+
+
+def publish(request: Request):
+    return request.app.state.publish_model
+
+
+@router.get(
+    "/models",
+    response_model=ModelListResponse,
+    summary="List exported model versions",
+    dependencies=[Depends(check_admin_token)],
+)
+async def get_models(
+    request: Request,
+    registry: ModelRegistry = Depends(get_registry)
+) -> ModelListResponse:
+    return await list_models(request, registry)
+
+
+@router.put(
+    "/models/pin/{version}",
+    response_model=ModelListResponse,
+    summary="Pin a model version",
+    description="""
+    Serve the given version until unpinned, instead of the newest export.
+    Returns once the version has been loaded, warmed up and swapped in.
+    If it fails to load, the previous model and pin are kept and 409 is
+    returned.
+    """,
+    dependencies=[Depends(check_admin_token)],
+)
+async def pin_model(
+    version: str,
+    request: Request,
+    registry: ModelRegistry = Depends(get_registry)
+) -> ModelListResponse:
+    if version not in {m["version"] for m in await describe(registry)}:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown model version: {version}",
+            headers={"X-Error-Type": "validation_error"}
+        )
+    previous_pin, registry.pinned = registry.pinned, version
+    error = await registry.sync(publish(request))
+    if error is not None:
+        registry.pinned = previous_pin
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Failed to load model {version}: {error}",
+            headers={"X-Error-Type": "model_error"}
+        )
+    return await list_models(request, registry)
+
+
+@router.delete(
+    "/models/pin",
+    response_model=ModelListResponse,
+    summary="Unpin the model version",
+    description="Go back to serving the newest exported model.",
+    dependencies=[Depends(check_admin_token)],
+)
+async def unpin_model(
+    request: Request,
+    registry: ModelRegistry = Depends(get_registry)
+) -> ModelListResponse:
+    registry.pinned = None
+    await registry.sync(publish(request))
+    return await list_models(request, registry)
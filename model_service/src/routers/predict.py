@@ -1,16 +1,68 @@
 from fastapi import APIRouter, Request, HTTPException, status, Depends
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from pydantic import ValidationError
 from src.models.prediction import (
+    BatchPredictItem,
+    BatchPredictRequest,
+    BatchPredictResponse,
     PredictRequest,
     PredictResponse,
     ErrorResponse
 )
-from src.utils.image_processing import preprocess_image
-from src.utils.validation import validate_image_data
-from typing import Any, Dict
-import torch
-from torch import Tensor
+from src.config import settings
+from src.utils.batching import MicroBatcher, QueueFullError
+from src.utils.executor import ExecutorSaturatedError, InferenceExecutor
+from src.utils.image_processing import decode_image, normalise_batch
+from src.utils.metrics import REQUESTS, STAGE_SECONDS
+from src.utils.model_loader import InferenceBackend, is_out_of_memory
+from src.utils.prediction_cache import PredictionCache
+from src.utils.validation import RAW_IMAGE_BYTES, validate_image_data
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import time
+import numpy as np
+
+# Compact wire format: bare 28x28 uint8 grayscale pixels, row-major. A
+# batch frame is several such images concatenated back to back.
+RAW_MEDIA_TYPE = "application/octet-stream"
+
+
+def error_type(exc: Exception) -> str:
+    """
+    The error_type a failed request is reported with, as the app's
+    exception handlers do.
+    """
+    if isinstance(exc, RequestValidationError):
+        return "validation_error"
+    if isinstance(exc, HTTPException) and exc.headers:
+        return exc.headers.get("X-Error-Type", "server_error")
+    return "server_error"
+
+
+class CountedRoute(APIRoute):
+    """
+    Counts each prediction request in model_service_requests_total by
+    outcome, including requests rejected while reading the body or
+    resolving dependencies.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def counted_handler(request: Request):
+            try:
+                response = await handler(request)
+            except Exception as e:
+                REQUESTS.inc(error_type(e))
+                raise
+            REQUESTS.inc("none")
+            return response
+
+        return counted_handler
+
 
 router = APIRouter(
+    route_class=CountedRoute,
     responses={
         status.HTTP_200_OK: {"model": PredictResponse},
         status.HTTP_400_BAD_REQUEST: {"model": ErrorResponse},
@@ -22,7 +74,7 @@ router = APIRouter(
 )
 
 
-async def get_model(request: Request) -> Any:
+async def get_model(request: Request) -> InferenceBackend:
     """
     Dependency to retrieve and validate the model from request state
     """
@@ -36,6 +88,208 @@ async def get_model(request: Request) -> Any:
     return model
 
 
+async def get_batcher(request: Request) -> MicroBatcher:
+    """
+    Dependency to retrieve the shared micro-batcher from app state
+    """
+    return request.app.state.batcher
+
+
+async def get_executor(request: Request) -> InferenceExecutor:
+    """
+    Dependency to retrieve the bounded preprocessing executor
+    """
+    return request.app.state.executor
+
+
+async def get_model_version(
+    model: InferenceBackend = Depends(get_model)
+) -> Optional[str]:
+    """
+    Dependency to retrieve the version of the model serving this request,
+    read from the model itself so it stays consistent across a hot swap
+    """
+    return model.version
+
+
+async def get_cache(request: Request) -> PredictionCache:
+    """
+    Dependency to retrieve the shared prediction cache
+    """
+    return request.app.state.prediction_cache
+
+
+def is_raw_request(request: Request) -> bool:
+    content_type = request.headers.get("content-type", "")
+    return content_type.split(";")[0].strip().lower() == RAW_MEDIA_TYPE
+
+
+async def read_raw_frame(request: Request, max_images: int) -> bytes:
+    body = await request.body()
+    if not body or len(body) % RAW_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(f"Raw image data must be a multiple of {RAW_IMAGE_BYTES} "
+                    "bytes (28x28 uint8 grayscale pixels per image)"),
+            headers={"X-Error-Type": "validation_error"}
+        )
+    if len(body) // RAW_IMAGE_BYTES > max_images:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=(f"Batch of {len(body) // RAW_IMAGE_BYTES} images "
+                    f"exceeds the limit of {max_images}"),
+            headers={"X-Error-Type": "validation_error"}
+        )
+    return body
+
+
+async def parse_json_body(request: Request, model_class):
+    try:
+        return model_class.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+
+async def read_predict_payload(request: Request) -> Union[str, bytes]:
+    """
+    Dependency negotiating the /predict request format: a JSON
+    PredictRequest, or a single raw 28x28 image as application/octet-stream
+    """
+    if is_raw_request(request):
+        return await read_raw_frame(request, max_images=1)
+    request_body = await parse_json_body(request, PredictRequest)
+    return request_body.image_data
+
+
+async def read_batch_payload(request: Request) -> Union[List[str], bytes]:
+    """
+    Dependency negotiating the /predict/batch request format: a JSON
+    BatchPredictRequest, or a packed frame of raw 28x28 images as
+    application/octet-stream
+    """
+    if is_raw_request(request):
+        return await read_raw_frame(
+            request, max_images=settings.batch_request_max_items)
+    request_body = await parse_json_body(request, BatchPredictRequest)
+    return request_body.images
+
+
+def request_body_schema(model_class, raw_description: str) -> Dict[str, Any]:
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": model_class.model_json_schema()
+                },
+                RAW_MEDIA_TYPE: {
+                    "schema": {
+                        "type": "string",
+                        "format": "binary",
+                        "description": raw_description
+                    }
+                },
+            },
+        }
+    }
+
+
+def service_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy. Please try again later.",
+        headers={"Retry-After": "1", "X-Error-Type": "server_error"}
+    )
+
+
+def resources_exhausted() -> HTTPException:
+    # CUDA out of memory during the forward pass
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server resource exhausted. Please try again later.",
+        headers={"Retry-After": "60", "X-Error-Type": "server_error"}
+    )
+
+
+def run_model(model: InferenceBackend, batch: np.ndarray) -> np.ndarray:
+    """
+    Run a batched forward pass and return per-row class probabilities.
+    Used by the micro-batcher's worker thread.
+    """
+    return model.predict(batch)
+
+
+def prepare_image(image_data: Union[str, bytes]) -> np.ndarray:
+    """
+    Validate and decode a single base64 image, or raw 28x28 pixel bytes,
+    into a (28, 28) uint8 grayscale array.
+    """
+    if isinstance(image_data, bytes):
+        # Always raw pixels, even if they happen to start like a PNG or JPEG
+        return np.frombuffer(image_data, dtype=np.uint8).reshape(28, 28)
+    _, image_bytes = validate_image_data(image_data)
+    return decode_image(image_bytes)
+
+
+def prepare_raw_batch(
+        frame: bytes
+) -> Tuple[List[BatchPredictItem], Optional[np.ndarray]]:
+    """
+    Split a packed frame of raw 28x28 images into an (N, 28, 28) array.
+    """
+    pixels = np.frombuffer(frame, dtype=np.uint8).reshape(-1, 28, 28)
+    results = [BatchPredictItem(index=i) for i in range(len(pixels))]
+    return results, pixels
+
+
+def prepare_batch(
+        images: List[str]
+) -> Tuple[List[BatchPredictItem], Optional[np.ndarray]]:
+    """
+    Decode every image in a batch request, recording a per-item error for
+    images that fail instead of raising. Returns the items and an
+    (N, 28, 28) uint8 array of the N valid images in request order, or None
+    if none were valid.
+    """
+    results: List[BatchPredictItem] = []
+    pixels: List[np.ndarray] = []
+    for index, image_data in enumerate(images):
+        item = BatchPredictItem(index=index)
+        try:
+            pixels.append(prepare_image(image_data))
+        except HTTPException as e:
+            item.error = ErrorResponse(
+                detail=e.detail, error_type="validation_error")
+        except ValueError as e:
+            item.error = ErrorResponse(
+                detail=f"Error processing image: {str(e)}",
+                error_type="processing_error"
+            )
+        results.append(item)
+
+    if not pixels:
+        return results, None
+    return results, np.stack(pixels)
+
+
+def build_response(
+        probabilities: np.ndarray,
+        model_version: Optional[str] = None
+) -> PredictResponse:
+    start = time.perf_counter()
+    predicted_digit: int = int(probabilities.argmax())
+    confidence_scores: Dict[str, float] = {
+        str(i): p for i, p in enumerate(probabilities.tolist())
+    }
+    response = PredictResponse(
+        prediction=str(predicted_digit),
+        confidence=confidence_scores,
+        model_version=model_version
+    )
+    STAGE_SECONDS.observe("serialise", time.perf_counter() - start)
+    return response
+
+
 @router.post(
     "/predict",
     response_model=PredictResponse,
@@ -45,49 +299,50 @@ async def get_model(request: Request) -> Any:
     runs inference using the loaded neural network model, and returns the
     predicted digit along with confidence scores for all possible digits.
 
+    Clients may instead send `application/octet-stream` with the 784 raw
+    uint8 pixels of a 28x28 grayscale image, skipping image encoding and
+    base64 entirely.
+
     The image should be a clear, centered digit on a contrasting background
     for best results.
     """,
     status_code=status.HTTP_200_OK,
+    openapi_extra=request_body_schema(
+        PredictRequest, "784 uint8 pixels of a 28x28 grayscale image"),
 )
 async def predict(
-    request_body: PredictRequest,
-    model: Any = Depends(get_model)
+    image_data: Union[str, bytes] = Depends(read_predict_payload),
+    model: InferenceBackend = Depends(get_model),
+    model_version: Optional[str] = Depends(get_model_version),
+    batcher: MicroBatcher = Depends(get_batcher),
+    executor: InferenceExecutor = Depends(get_executor),
+    cache: PredictionCache = Depends(get_cache)
 ) -> PredictResponse:
     try:
-        # Validate image data
-        _, base64_data = validate_image_data(request_body.image_data)
-
-        # Preprocess the image data
-        processed_image: Tensor = preprocess_image(base64_data)
-
-        # Ensure the processed image has a batch dimension
-        if processed_image.dim() == 3:
-            processed_image = processed_image.unsqueeze(0)
-
-        # Get the device from the model
-        device = next(model.parameters()).device
-        processed_image = processed_image.to(device)
-
-        # Run inference
-        with torch.no_grad():
-            output: Tensor = model(processed_image)
-            probabilities: Tensor = torch.softmax(output, dim=1).squeeze(0)
-            predicted_digit: int = int(probabilities.argmax().item())
-            confidence_scores: Dict[str, float] = {
-                str(i): float(probabilities[i].item())
-                for i in range(probabilities.size(0))
-            }
-
-        return PredictResponse(
-            prediction=str(predicted_digit),
-            confidence=confidence_scores
-        )
+        # Validate and decode the image data off the event loop
+        pixels: np.ndarray = await executor.run(prepare_image, image_data)
+
+        # Identical images (e.g. resubmitted canvases) skip the model
+        cache_key = cache.make_key(pixels)
+        cached = cache.get(cache_key, model_version)
+        if cached is not None:
+            return cached
+
+        # Queue for a coalesced forward pass with other pending requests
+        probabilities: np.ndarray = await batcher.predict(
+            model, normalise_batch(pixels))
+
+        response = build_response(probabilities[0], model_version)
+        cache.put(cache_key, model_version, response)
+        return response
 
     except HTTPException:
         # Re-raise HTTP exceptions to preserve their status codes
         raise
 
+    except (QueueFullError, ExecutorSaturatedError):
+        raise service_busy()
+
     except ValueError as e:
         # Handle preprocessing errors
         raise HTTPException(
@@ -96,18 +351,85 @@ async def predict(
             headers={"X-Error-Type": "processing_error"}
         )
 
-    except torch.cuda.OutOfMemoryError:
-        # Handle CUDA OOM errors
+    except Exception as e:
+        if is_out_of_memory(e):
+            raise resources_exhausted()
+        # Handle unexpected errors
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Server resource exhausted. Please try again later.",
-            headers={"Retry-After": "60", "X-Error-Type": "server_error"}
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error during inference: {str(e)}",
+            headers={"X-Error-Type": "model_error"}
+        )
+
+
+@router.post(
+    "/predict/batch",
+    response_model=BatchPredictResponse,
+    summary="Predict digits from a batch of images",
+    description="""
+    This endpoint accepts a list of base64-encoded images and runs them
+    through the model in a single forward pass. Results are returned in
+    request order; images that fail validation or preprocessing get a
+    per-item error instead of failing the whole batch.
+
+    Clients may instead send `application/octet-stream` with a packed
+    frame of N images, each 784 raw uint8 pixels of a 28x28 grayscale image.
+    """,
+    status_code=status.HTTP_200_OK,
+    openapi_extra=request_body_schema(
+        BatchPredictRequest,
+        "N * 784 uint8 pixels: 28x28 grayscale images back to back"),
+)
+async def predict_batch(
+    images: Union[List[str], bytes] = Depends(read_batch_payload),
+    model: InferenceBackend = Depends(get_model),
+    model_version: Optional[str] = Depends(get_model_version),
+    batcher: MicroBatcher = Depends(get_batcher),
+    executor: InferenceExecutor = Depends(get_executor),
+    cache: PredictionCache = Depends(get_cache)
+) -> BatchPredictResponse:
+    if (isinstance(images, list) and
+            len(images) > settings.batch_request_max_items):
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=(f"Batch of {len(images)} images exceeds "
+                    f"the limit of {settings.batch_request_max_items}"),
+            headers={"X-Error-Type": "validation_error"}
         )
 
+    prepare = prepare_raw_batch if isinstance(images, bytes) else prepare_batch
+    try:
+        results, pixels = await executor.run(prepare, images)
+        if pixels is None:
+            return BatchPredictResponse(results=results)
+
+        # Serve repeated images from the cache, run the rest in one pass
+        pending = []
+        decoded = (item for item in results if item.error is None)
+        for item, image in zip(decoded, pixels):
+            cache_key = cache.make_key(image)
+            item.result = cache.get(cache_key, model_version)
+            if item.result is None:
+                pending.append((item, cache_key, image))
+        if not pending:
+            return BatchPredictResponse(results=results)
+
+        batch = normalise_batch(np.stack([image for *_, image in pending]))
+        probabilities: np.ndarray = await batcher.predict(model, batch)
+
+    except (QueueFullError, ExecutorSaturatedError):
+        raise service_busy()
+
     except Exception as e:
-        # Handle unexpected errors
+        if is_out_of_memory(e):
+            raise resources_exhausted()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error during inference: {str(e)}",
             headers={"X-Error-Type": "model_error"}
         )
+
+    for (item, cache_key, _), row in zip(pending, probabilities):
+        item.result = build_response(row, model_version)
+        cache.put(cache_key, model_version, item.result)
+    return BatchPredictResponse(results=results)
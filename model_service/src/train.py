@@ -1,42 +1,167 @@
 import torch
+import torch.distributed as dist
 import torch.nn as nn
 import torch.optim as optim
-from src.data_loader import get_data_loaders
+from torch.nn.parallel import DistributedDataParallel
+from src.data_loader import DevicePrefetcher, get_data_loaders
 from src.model import MNISTCNN
+from src.utils.executor import available_cpus
 import argparse
+import contextlib
 import os
+import time
 from src.config import settings
 
 
-def train(model, device, train_loader, optimizer, criterion):
+def configure_threads(num_threads=0, interop_threads=0):
+    """
+    Set torch's intra-op and inter-op thread counts; 0 keeps the default.
+    Inter-op threads can only be set before any parallel work has run.
+    """
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0:
+        torch.set_num_interop_threads(interop_threads)
+
+
+def init_distributed(backend="gloo"):
+    """
+    Join the process group when launched by torchrun with more than one
+    process. Returns (rank, world size), or (0, 1) for a single process.
+    """
+    if int(os.environ.get("WORLD_SIZE", "1")) <= 1:
+        return 0, 1
+    dist.init_process_group(backend=backend)
+    return dist.get_rank(), dist.get_world_size()
+
+
+def distributed_threads(configured=0):
+    """
+    Intra-op threads per process so that the processes on this host share
+    its cores; torchrun would otherwise leave each with one thread.
+    """
+    if configured > 0:
+        return configured
+    local_processes = int(os.environ.get(
+        "LOCAL_WORLD_SIZE", os.environ.get("WORLD_SIZE", "1")))
+    return max(1, available_cpus() // local_processes)
+
+
+def reduce_sums(*values):
+    """
+    Sum each value over all processes when training distributed.
+    """
+    if not dist.is_initialized():
+        return list(values)
+    totals = torch.tensor(values, dtype=torch.float64)
+    dist.all_reduce(totals, op=dist.ReduceOp.SUM)
+    return totals.tolist()
+
+
+def broadcast_flag(flag):
+    """
+    Rank 0's value of `flag`, on every process.
+    """
+    if not dist.is_initialized():
+        return flag
+    value = torch.tensor([int(flag)])
+    dist.broadcast(value, src=0)
+    return bool(value.item())
+
+
+def set_epoch(loader, epoch):
+    # Reshuffles the shards of a DistributedSampler
+    sampler = getattr(loader, "sampler", None)
+    if hasattr(sampler, "set_epoch"):
+        sampler.set_epoch(epoch)
+
+
+def make_loss_fn(model, criterion, channels_last=False, bf16=False,
+                 compile=False):
+    """
+    Build the forward pass and loss of a step, returning (outputs, loss).
+
+    With `channels_last`, inputs are converted to match a model already
+    moved to that memory format. With `bf16`, the forward pass runs under
+    bfloat16 autocast and the loss is computed in float32. With
+    `compile`, the whole function is compiled by torch.compile, so
+    AOTAutograd also compiles its backward pass.
+    """
+    def loss_fn(data, target):
+        if channels_last:
+            data = data.contiguous(memory_format=torch.channels_last)
+        with torch.autocast(device_type=data.device.type,
+                            dtype=torch.bfloat16, enabled=bf16):
+            outputs = model(data)
+        return outputs, criterion(outputs.float(), target)
+
+    return torch.compile(loss_fn) if compile else loss_fn
+
+
+def train(model, device, train_loader, optimizer, criterion, loss_fn=None,
+          accumulation_steps=1, log_interval=0):
+    """
+    Train for one epoch and return the mean training loss.
+
+    The loss is summed on the device and read back once per epoch, or
+    every `log_interval` steps when printing progress, rather than every
+    step. With `accumulation_steps` above 1, gradients of that many
+    batches are averaged before each optimizer step; under DDP they are
+    only all-reduced on the batch that completes a step. A final group
+    of fewer batches is averaged over its own size and stepped on the
+    epoch's last batch.
+    """
     model.train()
-    running_loss = 0.0
-    for data, target in train_loader:
+    loss_fn = loss_fn or make_loss_fn(model, criterion)
+    running_loss = torch.zeros((), dtype=torch.float64, device=device)
+    samples = 0
+    num_batches = len(train_loader)
+    # Batches after this one form the final, incomplete accumulation group
+    last_full_step = num_batches - num_batches % accumulation_steps
+    optimizer.zero_grad(set_to_none=True)
+    for step, (data, target) in enumerate(train_loader, 1):
         data, target = data.to(device), target.to(device)
-        optimizer.zero_grad()
-        outputs = model(data)
-        loss = criterion(outputs, target)
-        loss.backward()
-        optimizer.step()
-        running_loss += loss.item() * data.size(0)
-    epoch_loss = running_loss / len(train_loader.dataset)
+        completes_step = (step % accumulation_steps == 0 or
+                          step == num_batches)
+        group_size = (accumulation_steps if step <= last_full_step
+                      else num_batches - last_full_step)
+        no_sync = getattr(model, "no_sync", None)
+        with (no_sync() if no_sync and not completes_step
+              else contextlib.nullcontext()):
+            outputs, loss = loss_fn(data, target)
+            (loss / group_size).backward()
+        if completes_step:
+            optimizer.step()
+            optimizer.zero_grad(set_to_none=True)
+        running_loss += loss.detach() * data.size(0)
+        samples += data.size(0)
+        if log_interval and step % log_interval == 0:
+            print(f"  Step {step}: Train Loss: "
+                  f"{running_loss.item() / samples:.4f}")
+    running_loss, samples = reduce_sums(running_loss.item(), samples)
+    epoch_loss = running_loss / samples
     return epoch_loss
 
 
-def validate(model, device, valid_loader, criterion):
+def validate(model, device, valid_loader, criterion, loss_fn=None):
     model.eval()
-    running_loss = 0.0
-    correct = 0
+    loss_fn = loss_fn or make_loss_fn(model, criterion)
+    # Summed on the device and read back once at the end
+    running_loss = torch.zeros((), dtype=torch.float64, device=device)
+    correct = torch.zeros((), dtype=torch.long, device=device)
+    samples = 0
     with torch.no_grad():
         for data, target in valid_loader:
             data, target = data.to(device), target.to(device)
-            outputs = model(data)
-            loss = criterion(outputs, target)
-            running_loss += loss.item() * data.size(0)
-            pred = outputs.argmax(dim=1, keepdim=True)
-            correct += pred.eq(target.view_as(pred)).sum().item()
-    epoch_loss = running_loss / len(valid_loader.dataset)
-    accuracy = correct / len(valid_loader.dataset)
+            outputs, loss = loss_fn(data, target)
+            running_loss += loss * data.size(0)
+            correct += (outputs.argmax(dim=1) == target).sum()
+            samples += data.size(0)
+    # Each process validated its own shard
+    running_loss, correct, samples = reduce_sums(
+        running_loss.item(), correct.item(), samples)
+    epoch_loss = running_loss / samples
+    accuracy = correct / samples
     return epoch_loss, accuracy
 
 
@@ -69,47 +194,207 @@ def main():
     parser.add_argument(
         '--checkpoint-dir',
         type=str,
-        default=settings.checkpoint_dir,
+        default=settings.checkpoints_dir,
         help='Directory to save checkpoints'
     )
+    parser.add_argument(
+        '--model-path',
+        type=str,
+        default=settings.model_path,
+        help='Where to save the best model'
+    )
+    parser.add_argument(
+        '--in-memory',
+        action='store_true',
+        help='Slice batches from a cached pre-normalised tensor dataset '
+             'instead of transforming each sample every epoch'
+    )
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=settings.train_num_workers,
+        help='DataLoader worker processes (0 loads in the main process)'
+    )
+    parser.add_argument(
+        '--pin-memory',
+        action=argparse.BooleanOptionalAction,
+        default=settings.train_pin_memory,
+        help='Load batches into pinned memory for faster GPU copies'
+    )
+    parser.add_argument(
+        '--persistent-workers',
+        action=argparse.BooleanOptionalAction,
+        default=settings.train_persistent_workers,
+        help='Keep DataLoader workers alive between epochs'
+    )
+    parser.add_argument(
+        '--prefetch-factor',
+        type=int,
+        default=settings.train_prefetch_factor,
+        help='Batches loaded ahead by each DataLoader worker'
+    )
+    parser.add_argument(
+        '--prefetch-batches',
+        type=int,
+        default=settings.train_prefetch_batches,
+        help='Batches loaded and moved to the device in the background '
+             'ahead of the training step (0 loads synchronously)'
+    )
+    parser.add_argument(
+        '--num-threads',
+        type=int,
+        default=settings.train_num_threads,
+        help='Intra-op threads (0 keeps the default)'
+    )
+    parser.add_argument(
+        '--interop-threads',
+        type=int,
+        default=settings.train_interop_threads,
+        help='Inter-op threads (0 keeps the default)'
+    )
+    parser.add_argument(
+        '--channels-last',
+        action=argparse.BooleanOptionalAction,
+        default=settings.train_channels_last,
+        help='Use the channels-last memory format for the model and inputs'
+    )
+    parser.add_argument(
+        '--bf16',
+        action=argparse.BooleanOptionalAction,
+        default=settings.train_bf16,
+        help='Run forward passes under bfloat16 autocast'
+    )
+    parser.add_argument(
+        '--compile',
+        action=argparse.BooleanOptionalAction,
+        default=settings.train_compile,
+        help='Compile the forward pass and loss with torch.compile'
+    )
+    parser.add_argument(
+        '--dist-backend',
+        type=str,
+        default=settings.train_dist_backend,
+        help='Process group backend when launched by torchrun'
+    )
+    parser.add_argument(
+        '--accumulation-steps',
+        type=int,
+        default=settings.train_accumulation_steps,
+        help='Batches whose gradients are accumulated per optimizer step'
+    )
+    parser.add_argument(
+        '--log-interval',
+        type=int,
+        default=settings.train_log_interval,
+        help='Print the running training loss every this many steps '
+             '(0 only prints per epoch)'
+    )
     args = parser.parse_args()
 
+    rank, world_size = init_distributed(args.dist_backend)
+    is_main = rank == 0
+    if world_size > 1:
+        args.num_threads = distributed_threads(args.num_threads)
+    configure_threads(args.num_threads, args.interop_threads)
+
     batch_size = args.batch_size
     num_epochs = args.num_epochs
     early_stopping_patience = args.patience
     learning_rate = args.lr
 
-    os.makedirs(args.checkpoint_dir, exist_ok=True)
-    # Create a CSV log file for training metrics
+    # Only rank 0 writes checkpoints and logs
     log_file = os.path.join(args.checkpoint_dir, "training_log.csv")
-    with open(log_file, "w") as f:
-        f.write("epoch,train_loss,valid_loss,valid_accuracy\n")
+    if is_main:
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(args.model_path) or ".", exist_ok=True)
+        # Create a CSV log file for training metrics
+        with open(log_file, "w") as f:
+            f.write("epoch,train_loss,valid_loss,valid_accuracy,"
+                    "epoch_seconds,data_wait_seconds,samples_per_second\n")
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    if world_size > 1 and args.dist_backend != "nccl":
+        device = torch.device("cpu")
+    elif torch.cuda.is_available():
+        device = torch.device(
+            "cuda", int(os.environ.get("LOCAL_RANK", "0")))
+    else:
+        device = torch.device("cpu")
 
-    # Load data
-    train_loader, test_loader = get_data_loaders(batch_size=batch_size)
+    # Load data, letting rank 0 download and cache it before the others
+    if not is_main:
+        dist.barrier()
+    train_loader, test_loader = get_data_loaders(
+        batch_size=batch_size,
+        in_memory=args.in_memory,
+        num_workers=args.num_workers,
+        pin_memory=args.pin_memory,
+        persistent_workers=args.persistent_workers,
+        prefetch_factor=args.prefetch_factor,
+        num_replicas=world_size,
+        rank=rank
+    )
+    if is_main and world_size > 1:
+        dist.barrier()
+    train_loader = DevicePrefetcher(
+        train_loader, device, depth=args.prefetch_batches)
     # For simplicity, using test_loader as validation loader in this example.
-    valid_loader = test_loader
+    valid_loader = DevicePrefetcher(
+        test_loader, device, depth=args.prefetch_batches)
 
     model = MNISTCNN().to(device)
+    if args.channels_last:
+        model = model.to(memory_format=torch.channels_last)
+    # DDP averages gradients across processes; checkpoints save `model`
+    train_model = model
+    if world_size > 1:
+        train_model = DistributedDataParallel(model)
     criterion = nn.CrossEntropyLoss()
+    loss_fn = make_loss_fn(
+        train_model, criterion,
+        channels_last=args.channels_last,
+        bf16=args.bf16,
+        compile=args.compile
+    )
     optimizer = optim.Adam(model.parameters(), lr=learning_rate)
 
     best_accuracy = 0.0
     epochs_without_improvement = 0
 
     for epoch in range(1, num_epochs + 1):
-        train_loss = train(model, device, train_loader, optimizer, criterion)
+        set_epoch(train_loader, epoch)
+        epoch_start = time.perf_counter()
+        train_loss = train(
+            train_model, device, train_loader, optimizer, criterion,
+            loss_fn,
+            accumulation_steps=max(1, args.accumulation_steps),
+            log_interval=args.log_interval if is_main else 0
+        )
+        epoch_seconds = time.perf_counter() - epoch_start
+        data_wait = train_loader.wait_seconds
+        samples_per_second = len(train_loader.dataset) / epoch_seconds
         valid_loss, valid_accuracy = validate(
-            model, device,
+            train_model, device,
             valid_loader,
-            criterion
+            criterion,
+            loss_fn
         )
+        if not is_main:
+            # Follow rank 0's early stopping decision
+            if broadcast_flag(False):
+                break
+            continue
+
         print(
             f"Epoch {epoch}: Train Loss: {train_loss:.4f}, "
             f"Valid Loss: {valid_loss:.4f}, Valid Acc: {valid_accuracy:.4f}"
         )
+        print(
+            f"  {epoch_seconds:.1f}s training: "
+            f"{data_wait:.1f}s waiting for data, "
+            f"{epoch_seconds - data_wait:.1f}s compute "
+            f"({data_wait / epoch_seconds:.0%} data-bound), "
+            f"{samples_per_second:.0f} samples/s"
+        )
         # Save checkpoint for this epoch
         checkpoint_path = os.path.join(
             args.checkpoint_dir, f"epoch_{epoch}.pth")
@@ -118,20 +403,28 @@ def main():
         with open(log_file, "a") as f:
             f.write(
                 f"{epoch},{train_loss:.4f},"
-                f"{valid_loss:.4f},{valid_accuracy:.4f}\n"
+                f"{valid_loss:.4f},{valid_accuracy:.4f},"
+                f"{epoch_seconds:.2f},{data_wait:.2f},"
+                f"{samples_per_second:.1f}\n"
             )
 
+        stop = False
         if valid_accuracy > best_accuracy:
             best_accuracy = valid_accuracy
             epochs_without_improvement = 0
             # Save the best model
-            torch.save(model.state_dict(), "model_service/src/best_model.pth")
+            torch.save(model.state_dict(), args.model_path)
             print("Validation accuracy improved, saving model.")
         else:
             epochs_without_improvement += 1
             if epochs_without_improvement >= early_stopping_patience:
                 print("Early stopping triggered.")
-                break
+                stop = True
+        if broadcast_flag(stop):
+            break
+
+    if world_size > 1:
+        dist.destroy_process_group()
 
 
 if __name__ == "__main__":
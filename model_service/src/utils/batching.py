@@ -0,0 +1,197 @@
+import asyncio
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the batching queue cannot accept more work."""
+
+
+@dataclass
+class _PendingItem:
+    model: Any
+    inputs: np.ndarray
+    future: Future
+    enqueued_at: float
+
+
+class BatchStats:
+    """
+    Running statistics for the micro-batcher: batch sizes and the time
+    each item spent queued before its forward pass started.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.Lock()
+        self._queue_waits: Deque[float] = deque(maxlen=window)
+        self._batch_sizes: Counter = Counter()
+        self.batches = 0
+        self.items = 0
+
+    def record(self, batch_size: int, queue_waits: List[float]):
+        with self._lock:
+            self.batches += 1
+            self.items += batch_size
+            self._batch_sizes[batch_size] += 1
+            self._queue_waits.extend(queue_waits)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._queue_waits)
+            sizes = dict(sorted(self._batch_sizes.items()))
+            batches, items = self.batches, self.items
+
+        def percentile(q: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(q * len(waits)))] * 1000
+
+        return {
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": items / batches if batches else 0.0,
+            "batch_size_counts": sizes,
+            "queue_wait_ms": {
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "p99": percentile(0.99),
+                "max": waits[-1] * 1000 if waits else 0.0,
+            },
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent inference requests into batched forward passes.
+
+    Callers submit preprocessed arrays of shape (N, 1, 28, 28). A single
+    worker thread waits for the first pending item, then keeps collecting
+    items for up to `max_wait_ms` or until `max_batch_size` rows have been
+    gathered, runs one forward pass via `forward(model, batch)` and hands
+    each caller back its own slice of the output.
+
+    Items are only coalesced when they target the same model instance, so
+    requests accepted before a model swap still finish on the old model.
+    """
+
+    def __init__(
+        self,
+        forward: Callable[[Any, np.ndarray], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+        max_queue_size: int = 256,
+    ):
+        self._forward = forward
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Optional[_PendingItem]]" = queue.Queue(
+            maxsize=max_queue_size
+        )
+        self._carry: Optional[_PendingItem] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.stats = BatchStats()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="micro-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def submit(self, model: Any, inputs: np.ndarray) -> Future:
+        """
+        Queue `inputs` for inference and return a future resolving to the
+        model output rows for those inputs.
+
+        Raises:
+            QueueFullError: If the pending queue is at capacity
+        """
+        self.start()
+        item = _PendingItem(model, inputs, Future(), time.perf_counter())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            raise QueueFullError("Inference queue is full")
+        return item.future
+
+    async def predict(self, model: Any, inputs: np.ndarray) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(model, inputs))
+
+    def _next_item(self, timeout: Optional[float]) -> Optional[_PendingItem]:
+        if self._carry is not None:
+            item, self._carry = self._carry, None
+            return item
+        if timeout is not None and timeout <= 0:
+            return self._queue.get_nowait()
+        return self._queue.get(timeout=timeout)
+
+    def _run(self):
+        while True:
+            item = self._next_item(timeout=None)
+            if item is None:
+                return
+
+            pending = [item]
+            rows = len(item.inputs)
+            deadline = time.perf_counter() + self.max_wait
+            stopping = False
+            while rows < self.max_batch_size:
+                try:
+                    item = self._next_item(deadline - time.perf_counter())
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                if (item.model is not pending[0].model or
+                        rows + len(item.inputs) > self.max_batch_size):
+                    self._carry = item
+                    break
+                pending.append(item)
+                rows += len(item.inputs)
+
+            self._execute(pending)
+            if stopping:
+                return
+
+    def _execute(self, pending: List[_PendingItem]):
+        pending = [
+            p for p in pending if p.future.set_running_or_notify_cancel()
+        ]
+        if not pending:
+            return
+
+        started = time.perf_counter()
+        inputs = [p.inputs for p in pending]
+        batch = inputs[0] if len(inputs) == 1 else np.concatenate(inputs)
+        try:
+            outputs = self._forward(pending[0].model, batch)
+        except BaseException as e:
+            for p in pending:
+                p.future.set_exception(e)
+            return
+
+        self.stats.record(
+            len(batch), [started - p.enqueued_at for p in pending]
+        )
+        offset = 0
+        for p in pending:
+            rows = len(p.inputs)
+            p.future.set_result(outputs[offset:offset + rows])
+            offset += rows
@@ -0,0 +1,83 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the inference executor has no free queue slots."""
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may run on, respecting container CPU sets.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def configure_torch_threads(num_threads: int):
+    """
+    Pin torch's intra-op thread pool size. A value of 0 or less keeps
+    torch's default of one thread per physical core.
+    """
+    if num_threads > 0:
+        import torch
+
+        torch.set_num_threads(num_threads)
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for CPU-bound request work (decoding, resizing,
+    normalising) so it never runs on the asyncio event loop.
+
+    At most `max_pending` calls may be running or queued at once; beyond
+    that `run` fails fast with ExecutorSaturatedError so callers can shed
+    load instead of piling up latency.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 64):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inference"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _acquire(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise ExecutorSaturatedError("Inference executor is full")
+            self._pending += 1
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` on the pool and await its result.
+
+        Raises:
+            ExecutorSaturatedError: If `max_pending` calls are in flight
+        """
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args)
+            )
+        finally:
+            self._release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -1,71 +1,126 @@
-import base64
 import io
-import re
-from PIL import Image, ImageOps
-import torchvision.transforms as transforms
-import torch
+import time
+import numpy as np
 from typing import Tuple
+from src.utils.metrics import STAGE_SECONDS
+from src.utils.validation import sniff_image_format
+
+MNIST_MEAN = 0.1307
+MNIST_STD = 0.3081
+
+
+def _normalisation_table(invert_colors: bool) -> np.ndarray:
+    """
+    Lookup table mapping every uint8 pixel value to its inverted (optional),
+    scaled and MNIST-normalised float32 value.
+    """
+    values = np.arange(256, dtype=np.float32)
+    if invert_colors:
+        values = 255.0 - values
+    return ((values / 255.0 - MNIST_MEAN) / MNIST_STD).astype(np.float32)
+
+
+# Precomputed once so normalising a batch is a single gather
+_NORMALISATION_TABLES = {
+    True: _normalisation_table(invert_colors=True),
+    False: _normalisation_table(invert_colors=False),
+}
+
+
+def decode_image(
+        image_bytes: bytes,
+        target_size: Tuple[int, int] = (28, 28)
+) -> np.ndarray:
+    """
+    Decode image bytes to a (height, width) uint8 grayscale array.
+
+    Raw grayscale buffers of exactly width * height bytes are used as-is;
+    PNG and JPEG data is decoded and resized with PIL.
+
+    Raises:
+        ValueError: If the bytes cannot be decoded as an image
+    """
+    width, height = target_size
+    if (len(image_bytes) == width * height and
+            sniff_image_format(image_bytes) is None):
+        return np.frombuffer(image_bytes, dtype=np.uint8).reshape(
+            height, width)
+
+    # Imported here so raw pixel requests never pay for loading PIL
+    from PIL import Image
+
+    start = time.perf_counter()
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        # Let JPEG decode straight to a reduced-size grayscale image
+        image.draft("L", target_size)
+        image = image.convert("L")
+    except Exception as e:
+        raise ValueError(f"Failed to open image data: {str(e)}")
+
+    decoded = time.perf_counter()
+    STAGE_SECONDS.observe("image_decode", decoded - start)
+
+    if image.size != target_size:
+        image = image.resize(target_size)
+    pixels = np.asarray(image, dtype=np.uint8)
+    STAGE_SECONDS.observe("resize", time.perf_counter() - decoded)
+    return pixels
+
+
+def normalise_batch(
+        pixels: np.ndarray,
+        invert_colors: bool = True
+) -> np.ndarray:
+    """
+    Invert (optionally), scale to [0, 1] and normalise with the MNIST mean
+    and std in one vectorised lookup over a whole batch.
+
+    Args:
+        pixels: uint8 array of shape (N, height, width) or (height, width)
+        invert_colors: Whether to invert the image colors
+
+    Returns:
+        A float32 array of shape (N, 1, height, width)
+    """
+    start = time.perf_counter()
+    if pixels.ndim == 2:
+        pixels = pixels[np.newaxis]
+    table = _NORMALISATION_TABLES[invert_colors]
+    normalised = table[pixels][:, np.newaxis]
+    STAGE_SECONDS.observe("normalise", time.perf_counter() - start)
+    return normalised
 
 
 def preprocess_image(
-        image_data: str,
+        image_bytes: bytes,
         target_size: Tuple[int, int] = (28, 28),
         invert_colors: bool = True
-) -> torch.Tensor:
+) -> np.ndarray:
     """
-    Preprocess the image data from a base64 encoded string.
+    Preprocess decoded image bytes, as returned by validate_image_data.
 
     Steps:
-    - Extracts the base64 content if in data URI format
-    - Decodes the base64 string to a PIL Image in grayscale
-    - Resizes the image to target_size
+    - Decodes PNG/JPEG bytes to grayscale and resizes to target_size, or
+      takes a raw width * height grayscale buffer as-is
     - Optionally inverts colors (useful if the drawing background is white)
-    - Converts the PIL Image to tensor and normalises using MNIST mean + std
+    - Scales and normalises using MNIST mean + std
 
     Args:
-        image_data: Base64 encoded image string, either raw or data URI format
+        image_bytes: Encoded PNG or JPEG bytes, or raw grayscale pixels
         target_size: Tuple of (width, height) to resize the image
         invert_colors: Whether to invert the image colors
 
     Returns:
-        A torch.Tensor of shape (1, target_size[0], target_size[1]) suitable
+        A float32 array of shape (1, target_size[0], target_size[1]) suitable
         for model input
 
     Raises:
         ValueError: If image processing fails
     """
     try:
-        # Check if the image is in data URI format
-        match = re.match(r'^data:image/\w+;base64,(.+)$', image_data)
-        if match:
-            image_data = match.group(1)
-
-        # Decode image data from base64 and open as grayscale
-        try:
-            image_bytes = base64.b64decode(image_data)
-        except Exception as e:
-            raise ValueError(f"Failed to decode base64 image data: {str(e)}")
-
-        try:
-            image = Image.open(io.BytesIO(image_bytes)).convert("L")
-        except Exception as e:
-            raise ValueError(f"Failed to open image data: {str(e)}")
-
-        # Resize image to target dimensions
-        image = image.resize(target_size)
-
-        # Invert colors if necessary (MNIST is typically white on black bg)
-        if invert_colors:
-            image = ImageOps.invert(image)
-
-        # Define transform: convert image to tensor normalise with MNIST values
-        transform_pipeline = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Normalize((0.1307,), (0.3081,))
-        ])
-
-        tensor = transform_pipeline(image)
-        return tensor
+        pixels = decode_image(image_bytes, target_size)
+        return normalise_batch(pixels, invert_colors)[0]
 
     except Exception as e:
         if isinstance(e, ValueError):
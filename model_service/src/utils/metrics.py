@@ -0,0 +1,152 @@
+import bisect
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from sub-100µs stages up to slow requests
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+class _Sharded:
+    """
+    Per-thread storage for metric values.
+
+    Each thread that records a value gets its own shard, so the hot path
+    only touches state no other thread writes and never takes a lock. The
+    lock is only taken once per thread to register its shard, and when
+    rendering to read all shards.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[dict] = []
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _all_shards(self) -> List[dict]:
+        with self._lock:
+            return list(self._shards)
+
+
+class Counter(_Sharded):
+    """
+    Monotonic counter with a single label.
+    """
+
+    def __init__(self, name: str, description: str, label: str):
+        super().__init__()
+        self.name = name
+        self.description = description
+        self.label = label
+
+    def inc(self, label_value: str, amount: float = 1):
+        shard = self._shard()
+        shard[label_value] = shard.get(label_value, 0) + amount
+
+    def values(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        for shard in self._all_shards():
+            for label_value, value in list(shard.items()):
+                totals[label_value] = totals.get(label_value, 0) + value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} counter"
+        for label_value, value in sorted(self.values().items()):
+            yield f'{self.name}{{{self.label}="{label_value}"}} {value}'
+
+
+class Histogram(_Sharded):
+    """
+    Latency histogram with a single label, e.g. one series per pipeline
+    stage. Values are observed in seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label: str,
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__()
+        self.name = name
+        self.description = description
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, label_value: str, seconds: float):
+        shard = self._shard()
+        series = shard.get(label_value)
+        if series is None:
+            # Per-bucket counts (last slot is +Inf), then the running sum
+            series = shard[label_value] = [0] * (len(self.buckets) + 1)
+            series.append(0.0)
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def values(self) -> Dict[str, List[float]]:
+        totals: Dict[str, List[float]] = {}
+        for shard in self._all_shards():
+            for label_value, series in list(shard.items()):
+                total = totals.setdefault(label_value, [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+        return totals
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        for label_value, series in sorted(self.values().items()):
+            label = f'{self.label}="{label_value}"'
+            bucket = f"{self.name}_bucket{{{label},le="
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f'{bucket}"{bound}"}} {cumulative}'
+            count = cumulative + series[-2]
+            yield f'{bucket}"+Inf"}} {count}'
+            yield f"{self.name}_sum{{{label}}} {series[-1]}"
+            yield f"{self.name}_count{{{label}}} {count}"
+
+
+STAGE_SECONDS = Histogram(
+    "model_service_stage_seconds",
+    "Time spent in each /predict pipeline stage. forward and "
+    "device_transfer are observed once per batched forward pass.",
+    "stage",
+)
+REQUESTS = Counter(
+    "model_service_requests_total",
+    "Prediction requests by outcome error_type (none for successes).",
+    "error_type",
+)
+
+
+def render_value(
+    name: str, description: str, metric_type: str, value: float
+) -> Iterable[str]:
+    """
+    Render a single unlabelled counter or gauge, e.g. from a stats snapshot.
+    """
+    yield f"# HELP {name} {description}"
+    yield f"# TYPE {name} {metric_type}"
+    yield f"{name} {value}"
+
+
+def render_metrics(extra: Iterable[str] = ()) -> str:
+    """
+    Render all service metrics in the Prometheus text exposition format.
+    """
+    lines = [*STAGE_SECONDS.render(), *REQUESTS.render(), *extra]
+    return "\n".join(lines) + "\n"
@@ -1,6 +1,120 @@
+import hashlib
+import json
 import os
-import torch
-from src.model import MNISTCNN
+import sys
+import time
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+from src.utils.metrics import STAGE_SECONDS
+
+# torch is imported lazily so the onnxruntime backend never loads it and
+# the service can start answering liveness checks before it is imported
+
+# Metadata file embedded in exported TorchScript archives by export.py
+VARIANT_FILE = "variant.json"
+INFERENCE_BACKENDS = ("torchscript", "onnxruntime")
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+
+class InferenceBackend(ABC):
+    """
+    Serving interface shared by the model runtimes: maps a float32 batch of
+    normalised images, shape (N, 1, 28, 28), to class probabilities of
+    shape (N, 10).
+    """
+
+    name = "base"
+    # Content hash of the served model file, set once loaded
+    version: Optional[str] = None
+
+    @abstractmethod
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Class probabilities, shape (N, 10), for a normalised batch.
+        """
+
+
+class TorchBackend(InferenceBackend):
+    """
+    Runs a TorchScript or eager PyTorch model.
+    """
+
+    name = "torchscript"
+
+    def __init__(self, model):
+        import torch
+
+        self._torch = torch
+        self.model = model
+        # Frozen and quantized exports have no parameters and run on the CPU
+        parameter = next(iter(model.parameters()), None)
+        self.device = parameter.device if parameter is not None else "cpu"
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        torch = self._torch
+        with torch.no_grad():
+            start = time.perf_counter()
+            inputs = torch.from_numpy(batch).to(self.device)
+            transferred = time.perf_counter()
+            output = self.model(inputs)
+            probabilities = torch.softmax(output, dim=1).cpu().numpy()
+        STAGE_SECONDS.observe("device_transfer", transferred - start)
+        STAGE_SECONDS.observe("forward", time.perf_counter() - transferred)
+        return probabilities
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    Runs an ONNX export on ONNX Runtime's CPU execution provider.
+    """
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path: str, intra_op_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = (
+            ort.GraphOptimizationLevel.ORT_ENABLE_ALL)
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        probabilities = softmax(
+            self.session.run(None, {self.input_name: batch})[0])
+        STAGE_SECONDS.observe("forward", time.perf_counter() - start)
+        return probabilities
+
+
+def load_torchscript(model_path: str):
+    """
+    Load an exported TorchScript model, configuring torch for the export
+    variant recorded in its metadata (float, frozen, channels-last or int8).
+    """
+    import torch
+
+    extra_files = {VARIANT_FILE: ""}
+    model = torch.jit.load(model_path, _extra_files=extra_files)
+    variant = json.loads(extra_files[VARIANT_FILE] or '{"mode": "script"}')
+
+    engine = variant.get("quantized_engine")
+    if engine:
+        if engine not in torch.backends.quantized.supported_engines:
+            raise RuntimeError(
+                f"Quantized engine {engine} is not supported on this host")
+        torch.backends.quantized.engine = engine
+    if variant.get("optimize_for_inference"):
+        model = torch.jit.optimize_for_inference(model)
+    return model, variant
 
 
 def load_model(model_path: str):
@@ -10,10 +124,13 @@ def load_model(model_path: str):
     """
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found at {model_path}")
+    import torch
+    from src.model import MNISTCNN
+
     try:
         # For TorchScript models use torch.jit.load instead
         if model_path.endswith('.pt'):
-            model = torch.jit.load(model_path)
+            model, _ = load_torchscript(model_path)
         else:
             # For regular PyTorch models
             model = MNISTCNN()
@@ -23,3 +140,68 @@ def load_model(model_path: str):
         return model
     except Exception as e:
         raise RuntimeError(f"Error loading model: {e}")
+
+
+def load_backend(
+        model_path: str,
+        backend: str = "torchscript",
+        intra_op_threads: int = 0
+) -> InferenceBackend:
+    """
+    Load the model at `model_path` behind the configured inference backend.
+    """
+    if backend == "onnxruntime":
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found at {model_path}")
+        try:
+            return OnnxRuntimeBackend(model_path, intra_op_threads)
+        except Exception as e:
+            raise RuntimeError(f"Error loading model: {e}")
+    if backend == "torchscript":
+        return TorchBackend(load_model(model_path))
+    raise ValueError(
+        f"Unknown inference backend {backend!r}, "
+        f"expected one of {', '.join(INFERENCE_BACKENDS)}")
+
+
+def model_version(model_path: str) -> str:
+    """
+    Content fingerprint of a model file, used to tell loaded models apart.
+    """
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def is_out_of_memory(error: BaseException) -> bool:
+    """
+    Whether `error` is a CUDA out-of-memory error, without importing torch
+    when the serving backend does not use it.
+    """
+    torch = sys.modules.get("torch")
+    return torch is not None and isinstance(
+        error, torch.cuda.OutOfMemoryError)
+
+
+def warm_up(
+        backend: InferenceBackend,
+        batch_sizes: Iterable[int],
+        iterations: int = 3
+) -> Dict[int, List[float]]:
+    """
+    Run forward passes at each served batch size so JIT profiling, kernel
+    selection and allocator growth happen before the first real request.
+    Returns the per-iteration latencies in milliseconds by batch size.
+    """
+    timings: Dict[int, List[float]] = {}
+    for batch_size in batch_sizes:
+        batch = np.zeros((batch_size, 1, 28, 28), dtype=np.float32)
+        timings[batch_size] = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            backend.predict(batch)
+            timings[batch_size].append(
+                (time.perf_counter() - start) * 1000)
+    return timings
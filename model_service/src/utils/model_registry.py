@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.utils.model_loader import (
+    InferenceBackend,
+    load_backend,
+    model_version,
+    warm_up
+)
+
+logger = logging.getLogger("model_service")
+
+# File extension of the exports each inference backend can serve
+MODEL_EXTENSIONS = {"torchscript": ".pt", "onnxruntime": ".onnx"}
+
+
+@dataclass
+class ModelEntry:
+    version: str
+    path: str
+    modified: float
+
+
+class ModelRegistry:
+    """
+    Serves the newest exported model found in a directory, or a pinned
+    version, and hot swaps to it without downtime.
+
+    `sync` loads and warms the wanted version off the event loop, then
+    hands it to `publish` on the event loop, so the swap is a single
+    assignment between requests. Requests already holding the previous
+    model finish on it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        backend: str = "torchscript",
+        intra_op_threads: int = 0,
+        warmup_batch_sizes: Tuple[int, ...] = (1,),
+        warmup_iterations: int = 3,
+        poll_seconds: float = 5.0,
+    ):
+        self.directory = directory
+        self.backend = backend
+        self.intra_op_threads = intra_op_threads
+        self.warmup_batch_sizes = warmup_batch_sizes
+        self.warmup_iterations = warmup_iterations
+        self.poll_seconds = poll_seconds
+        self.pinned: Optional[str] = None
+        self.active: Optional[ModelEntry] = None
+        self.last_load: Dict[str, Any] = {}
+        self._versions: Dict[Tuple[str, float, int], str] = {}
+        self._failed: Dict[str, str] = {}
+        self._lock = asyncio.Lock()
+
+    def scan(self) -> List[ModelEntry]:
+        """
+        Exported models in the directory, newest first. Versions are
+        content hashes, only recomputed when a file changes.
+        """
+        extension = MODEL_EXTENSIONS[self.backend]
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not name.endswith(extension):
+                continue
+            try:
+                stat = os.stat(path)
+                identity = (path, stat.st_mtime, stat.st_size)
+                if identity not in self._versions:
+                    self._versions[identity] = model_version(path)
+            except OSError:
+                # Deleted or replaced while scanning
+                continue
+            entries.append(ModelEntry(
+                self._versions[identity], path, stat.st_mtime))
+        return sorted(entries, key=lambda e: e.modified, reverse=True)
+
+    def wanted(self, entries: List[ModelEntry]) -> Optional[ModelEntry]:
+        """
+        The pinned version if set, otherwise the newest model that has not
+        failed to load.
+        """
+        if self.pinned is not None:
+            return next(
+                (e for e in entries if e.version == self.pinned), None)
+        return next(
+            (e for e in entries if e.version not in self._failed), None)
+
+    def load(self, entry: ModelEntry) -> InferenceBackend:
+        start = time.perf_counter()
+        model = load_backend(
+            entry.path, self.backend, intra_op_threads=self.intra_op_threads)
+        model.version = entry.version
+        loaded = time.perf_counter()
+        timings = warm_up(
+            model, self.warmup_batch_sizes, self.warmup_iterations)
+        self.last_load = {
+            "version": entry.version,
+            "load_ms": (loaded - start) * 1000,
+            "warmup_ms": timings,
+            "warmup_total_ms": (time.perf_counter() - loaded) * 1000,
+        }
+        return model
+
+    async def sync(
+        self, publish: Callable[[InferenceBackend], None]
+    ) -> Optional[str]:
+        """
+        Load, warm and publish the wanted version if it is not already
+        being served. Returns the error if it failed to load, in which
+        case the current model is kept.
+        """
+        async with self._lock:
+            entries = await asyncio.to_thread(self.scan)
+            entry = self.wanted(entries)
+            if entry is None or (
+                    self.active is not None and
+                    entry.version == self.active.version):
+                return
+            logger.info(f"Loading model {entry.version} from {entry.path}")
+            try:
+                model = await asyncio.to_thread(self.load, entry)
+            except Exception as e:
+                logger.error(f"Failed to load model {entry.version}: {e}")
+                self._failed[entry.version] = str(e)
+                return self._failed[entry.version]
+            self._failed.pop(entry.version, None)
+            previous = self.active
+            self.active = entry
+            publish(model)
+            logger.info(
+                f"Now serving model {entry.version}"
+                + (f" (was {previous.version})" if previous else ""))
+
+    async def watch(self, publish: Callable[[InferenceBackend], None]):
+        """
+        Poll the directory for new exports until cancelled.
+        """
+        while True:
+            try:
+                await self.sync(publish)
+            except Exception as e:
+                logger.error(f"Model registry sync failed: {e}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "version": e.version,
+                "path": e.path,
+                "modified": e.modified,
+                "active": (self.active is not None and
+                           e.version == self.active.version),
+                "pinned": e.version == self.pinned,
+                "error": self._failed.get(e.version),
+            }
+            for e in self.scan()
+        ]
@@ -0,0 +1,119 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+import numpy as np
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of prediction responses keyed by the content of the
+    normalised 28x28 pixel buffer and the version of the model that
+    produced them.
+
+    Entries expire after `ttl_seconds`. Looking up or storing an entry for
+    a newer model version than the one currently cached drops every
+    entry, so a model swap invalidates the cache automatically. Lookups
+    and results from a swapped-out version, still in flight on the old
+    model, miss and are not stored. `activate` makes a version current
+    again, e.g. when an older model is pinned.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._model_version: Optional[str] = None
+        self._retired: Set[Optional[str]] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(pixels: np.ndarray) -> bytes:
+        """
+        Content hash of a uint8 pixel buffer.
+        """
+        return hashlib.blake2b(
+            np.ascontiguousarray(pixels).data, digest_size=16
+        ).digest()
+
+    def _sync_version(self, model_version: Optional[str]):
+        if model_version != self._model_version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._retired.add(self._model_version)
+            self._retired.discard(model_version)
+            self._model_version = model_version
+
+    def activate(self, model_version: Optional[str]):
+        """
+        Make `model_version` the cached version, dropping entries of any
+        other.
+        """
+        with self._lock:
+            self._sync_version(model_version)
+
+    def get(self, key: bytes, model_version: Optional[str]) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if model_version in self._retired:
+                self.misses += 1
+                return None
+            self._sync_version(model_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, model_version: Optional[str], value: Any):
+        if not self.enabled:
+            return
+        with self._lock:
+            if model_version in self._retired:
+                return
+            self._sync_version(model_version)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "model_version": self._model_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,125 @@
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Dict
+
+import uvicorn
+from src.utils.executor import available_cpus
+
+logger = logging.getLogger("model_service")
+
+# Minimum seconds between restarts of a crashing worker slot
+RESTART_BACKOFF_S = 1.0
+
+
+def threads_per_worker(workers: int, configured: int = 0) -> int:
+    """
+    Intra-op threads for each worker so that all workers together use
+    every core once without oversubscribing. An explicit thread count
+    greater than 0 wins.
+    """
+    if configured > 0:
+        return configured
+    return max(1, available_cpus() // max(1, workers))
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """
+    Serves an ASGI app from several forked uvicorn workers sharing one
+    listening socket.
+
+    Everything the parent loads before `run` (the app, torch and the model
+    weights) is inherited by the workers copy-on-write instead of being
+    imported and loaded once per worker. `on_worker_start(index)` runs in
+    each worker right after the fork, before it starts serving. Workers
+    that die are restarted; SIGINT or SIGTERM stops them all.
+    """
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        workers: int,
+        on_worker_start: Callable[[int], None] = lambda index: None,
+    ):
+        self.config = config
+        self.workers = max(1, workers)
+        self.on_worker_start = on_worker_start
+        self._children: Dict[int, int] = {}
+        self._started: Dict[int, float] = {}
+        self._stopping = False
+
+    def run(self):
+        sock = bind_socket(self.config.host, self.config.port,
+                           self.config.backlog)
+        logger.info(
+            f"Serving on {self.config.host}:{self.config.port} with "
+            f"{self.workers} forked workers")
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        try:
+            for index in range(self.workers):
+                self._spawn(index, sock)
+            self._supervise(sock)
+        finally:
+            sock.close()
+
+    def _spawn(self, index: int, sock: socket.socket):
+        pid = os.fork()
+        if pid:
+            self._children[pid] = index
+            self._started[index] = time.monotonic()
+            return
+
+        # Worker process: uvicorn installs its own signal handlers
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        status = 0
+        try:
+            self.on_worker_start(index)
+            uvicorn.Server(self.config).run(sockets=[sock])
+        except BaseException:
+            logger.exception(f"Worker {index} failed")
+            status = 1
+        finally:
+            os._exit(status)
+
+    def _supervise(self, sock: socket.socket):
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self._children.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+            logger.warning(
+                f"Worker {index} (pid {pid}) exited with status "
+                f"{os.waitstatus_to_exitcode(status)}, restarting")
+            uptime = time.monotonic() - self._started[index]
+            if uptime < RESTART_BACKOFF_S:
+                time.sleep(RESTART_BACKOFF_S - uptime)
+            if not self._stopping:
+                self._spawn(index, sock)
+
+    def _stop(self, signum, frame):
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("Stopping workers...")
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
@@ -1,66 +1,127 @@
 import base64
+import binascii
 import re
+import time
 from fastapi import HTTPException, status
-from typing import Tuple
+from src.utils.metrics import STAGE_SECONDS
+from typing import Optional, Tuple
 
+MAX_IMAGE_BYTES = 10 * 1024 * 1024  # 10MB limit
+SUPPORTED_FORMATS = ("jpeg", "jpg", "png")
+# A bare 28x28 grayscale pixel buffer, one byte per pixel
+RAW_IMAGE_BYTES = 28 * 28
 
-def validate_image_data(image_data: str) -> Tuple[str, str]:
+DATA_URI_PATTERN = re.compile(r'^data:image/(\w+);base64,')
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+)
+
+
+def invalid_image(status_code: int, detail: str) -> HTTPException:
+    """
+    An HTTPException for bad client input, labelled as a validation error
+    in the response and the request metrics.
+    """
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"X-Error-Type": "validation_error"}
+    )
+
+
+def sniff_image_format(header: bytes) -> Optional[str]:
+    """
+    Identify the image format from its leading magic bytes.
+    """
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+
+def decoded_size(base64_data: str) -> int:
     """
-    Validates the format and content of the image data.
+    Number of bytes `base64_data` decodes to, computed without decoding.
+    """
+    padding = len(base64_data) - len(base64_data.rstrip("="))
+    return len(base64_data) * 3 // 4 - padding
+
+
+def validate_image_data(image_data: str) -> Tuple[str, bytes]:
+    """
+    Validates the image data and decodes it exactly once.
+
+    Size is checked from the base64 length and format from the first few
+    decoded header bytes before the full payload is decoded, so oversized
+    or unsupported uploads are rejected without paying for the decode.
 
     Args:
-        image_data: Base64 encoded image string
+        image_data: Base64 encoded image string, raw or data URI format
 
     Returns:
-        Tuple containing image format and base64 data
+        Tuple containing the image format ("png", "jpeg" or "raw" for a
+        bare 28x28 grayscale buffer) and the decoded image bytes
 
     Raises:
         HTTPException: If validation fails
     """
+    start = time.perf_counter()
     if not image_data:
-        raise HTTPException(
+        raise invalid_image(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Image data is required"
         )
 
     # Check for data URI format (data:image/format;base64,...)
-    pattern = r'^data:image/(\w+);base64,(.+)$'
-    match = re.match(pattern, image_data)
-
-    if not match:
-        # Try with just raw base64 data
-        try:
-            base64.b64decode(image_data)
-            return "unknown", image_data
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid image data format. "
-                       "Expected base64 encoded image data"
+    match = DATA_URI_PATTERN.match(image_data)
+    if match:
+        declared_format = match.group(1).lower()
+        if declared_format not in SUPPORTED_FORMATS:
+            raise invalid_image(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=(f"Unsupported image format: {match.group(1)}. "
+                        "Supported formats: JPEG, PNG")
             )
+        base64_data = image_data[match.end():]
+    else:
+        base64_data = image_data
 
-    image_format, base64_data = match.groups()
-
-    # Validate supported image formats
-    if image_format.lower() not in ["jpeg", "jpg", "png"]:
-        raise HTTPException(
-            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-            detail=(f"Unsupported image format: {image_format}. "
-                    "Supported formats: JPEG, PNG")
+    if decoded_size(base64_data) > MAX_IMAGE_BYTES:
+        raise invalid_image(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Image size exceeds the 10MB limit"
         )
 
-    # Validate base64 encoding and size
     try:
-        decoded_data = base64.b64decode(base64_data)
-        if len(decoded_data) > 10 * 1024 * 1024:  # 10MB limit
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail="Image size exceeds the 10MB limit"
+        image_format = sniff_image_format(base64.b64decode(base64_data[:12]))
+    except (binascii.Error, ValueError):
+        image_format = None
+    if image_format is None and not match:
+        if decoded_size(base64_data) == RAW_IMAGE_BYTES:
+            image_format = "raw"
+    if image_format is None:
+        if match:
+            raise invalid_image(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Image content is not a JPEG or PNG image"
             )
-    except Exception:
-        raise HTTPException(
+        raise invalid_image(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid image data format. "
+                   "Expected base64 encoded image data"
+        )
+
+    decode_start = time.perf_counter()
+    STAGE_SECONDS.observe("validation", decode_start - start)
+    try:
+        image_bytes = base64.b64decode(base64_data)
+    except (binascii.Error, ValueError):
+        raise invalid_image(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid base64 encoding"
         )
+    STAGE_SECONDS.observe(
+        "base64_decode", time.perf_counter() - decode_start)
 
-    return image_format, base64_data
+    return image_format, image_bytes
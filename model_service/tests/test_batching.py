@@ -0,0 +1,95 @@
+import threading
+import numpy as np
+import pytest
+from model_service.src.utils.batching import MicroBatcher, QueueFullError
+
+
+def double(model, batch):
+    model.append(len(batch))
+    return batch * 2
+
+
+def test_concurrent_items_are_coalesced():
+    """
+    Items submitted within the wait window run as a single forward pass and
+    each caller receives only its own rows.
+    """
+    calls = []
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=200)
+    try:
+        futures = [
+            batcher.submit(calls, np.full((1, 1, 28, 28), float(i)))
+            for i in range(4)
+        ]
+        results = [f.result(timeout=5) for f in futures]
+    finally:
+        batcher.stop()
+
+    assert calls == [4]
+    for i, result in enumerate(results):
+        assert result.shape == (1, 1, 28, 28)
+        assert np.all(result == 2 * i)
+    assert batcher.stats.snapshot()["batch_size_counts"] == {4: 1}
+
+
+def test_batches_respect_max_batch_size():
+    calls = []
+    batcher = MicroBatcher(double, max_batch_size=2, max_wait_ms=200)
+    try:
+        futures = [
+            batcher.submit(calls, np.zeros((1, 1, 28, 28))) for _ in range(5)
+        ]
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        batcher.stop()
+
+    assert calls == [2, 2, 1]
+
+
+def test_items_for_different_models_are_not_mixed():
+    old_calls, new_calls = [], []
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=200)
+    try:
+        futures = [
+            batcher.submit(old_calls, np.zeros((1, 1, 28, 28))),
+            batcher.submit(new_calls, np.zeros((1, 1, 28, 28))),
+        ]
+        for f in futures:
+            f.result(timeout=5)
+    finally:
+        batcher.stop()
+
+    assert old_calls == [1]
+    assert new_calls == [1]
+
+
+def test_forward_errors_propagate_to_callers():
+    def failing(model, batch):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(failing, max_wait_ms=0)
+    try:
+        future = batcher.submit(None, np.zeros((1, 1, 28, 28)))
+        with pytest.raises(RuntimeError, match="boom"):
+            future.result(timeout=5)
+    finally:
+        batcher.stop()
+
+
+def test_full_queue_rejects_new_items():
+    release = threading.Event()
+
+    def blocking(model, batch):
+        release.wait(5)
+        return batch
+
+    batcher = MicroBatcher(blocking, max_wait_ms=0, max_queue_size=1)
+    try:
+        batcher.submit(None, np.zeros((1, 1, 28, 28)))
+        with pytest.raises(QueueFullError):
+            for _ in range(3):
+                batcher.submit(None, np.zeros((1, 1, 28, 28)))
+    finally:
+        release.set()
+        batcher.stop()
@@ -0,0 +1,165 @@
+import os
+import numpy as np
+import pytest
+import torch
+from model_service.src.data_loader import (
+    MNIST_MEAN,
+    MNIST_STD,
+    DevicePrefetcher,
+    TensorBatchLoader,
+    evaluation_sampler,
+    get_data_loaders,
+    load_tensor_mnist,
+    loader_options,
+    tensor_cache_paths
+)
+
+
+def write_idx(root, split, count):
+    """
+    Write a tiny MNIST split in the IDX format torchvision reads.
+    """
+    raw = os.path.join(root, "MNIST", "raw")
+    os.makedirs(raw, exist_ok=True)
+    images = np.arange(count * 784, dtype=np.uint32) % 256
+    labels = np.arange(count, dtype=np.uint8) % 10
+    with open(os.path.join(raw, f"{split}-images-idx3-ubyte"), "wb") as f:
+        f.write(np.array([2051, count, 28, 28], dtype=">i4").tobytes())
+        f.write(images.astype(np.uint8).tobytes())
+    with open(os.path.join(raw, f"{split}-labels-idx1-ubyte"), "wb") as f:
+        f.write(np.array([2049, count], dtype=">i4").tobytes())
+        f.write(labels.tobytes())
+    return images.astype(np.uint8).reshape(count, 1, 28, 28), labels
+
+
+@pytest.fixture
+def mnist_root(tmp_path):
+    root = str(tmp_path)
+    pixels, labels = write_idx(root, "t10k", 10)
+    write_idx(root, "train", 25)
+    return root, pixels, labels
+
+
+def test_tensor_dataset_is_normalised_and_cached(mnist_root):
+    """
+    Test that the cached split matches ToTensor + Normalize and is reused
+    """
+    root, pixels, labels = mnist_root
+    images, targets = load_tensor_mnist(root, train=False, download=False)
+
+    expected = (pixels / 255.0 - MNIST_MEAN) / MNIST_STD
+    assert images.shape == (10, 1, 28, 28)
+    assert images.dtype == torch.float32
+    assert np.allclose(images.numpy(), expected, atol=1e-5)
+    assert targets.tolist() == labels.tolist()
+
+    # A second load maps the cache rather than decoding the IDX files
+    for name in os.listdir(os.path.join(root, "MNIST", "raw")):
+        os.remove(os.path.join(root, "MNIST", "raw", name))
+    cached, _ = load_tensor_mnist(root, train=False, download=False)
+    assert torch.equal(cached, images)
+    assert all(os.path.exists(p) for p in tensor_cache_paths(root, False))
+
+
+def test_tensor_loader_matches_standard_loader(mnist_root, monkeypatch):
+    """
+    Test that in-memory batches equal those of the torchvision pipeline
+    """
+    root, _, _ = mnist_root
+    monkeypatch.chdir(os.path.dirname(root))
+    os.rename(root, os.path.join(os.path.dirname(root), "data"))
+
+    _, standard = get_data_loaders(batch_size=4, download=False)
+    _, in_memory = get_data_loaders(
+        batch_size=4, download=False, in_memory=True)
+
+    assert len(in_memory) == len(standard) == 3
+    assert len(in_memory.dataset) == 10
+    for (a, a_target), (b, b_target) in zip(standard, in_memory):
+        assert torch.allclose(a, b, atol=1e-5)
+        assert torch.equal(a_target, b_target)
+
+
+def test_shuffled_batches_cover_every_sample_once():
+    """
+    Test that a shuffled epoch yields each sample exactly once
+    """
+    images = torch.arange(10, dtype=torch.float32).view(10, 1, 1, 1)
+    loader = TensorBatchLoader(
+        images, torch.arange(10), batch_size=4, shuffle=True)
+
+    batches = list(loader)
+    assert [len(target) for _, target in batches] == [4, 4, 2]
+    seen = torch.cat([target for _, target in batches])
+    assert sorted(seen.tolist()) == list(range(10))
+    for data, target in batches:
+        assert torch.equal(data.view(-1).long(), target)
+
+
+def test_evaluation_shards_cover_every_sample_once():
+    """
+    Test that evaluation shards split an uneven dataset without padding
+    """
+    loaders = []
+    for rank in range(3):
+        loader = TensorBatchLoader(
+            torch.zeros(10, 1, 1, 1), torch.arange(10), batch_size=4)
+        loader.sampler = evaluation_sampler(loader.dataset, 3, rank)
+        loaders.append(loader)
+
+    seen = [target.tolist() for loader in loaders for _, target in loader]
+    assert sorted(sum(seen, [])) == list(range(10))
+    assert [len(loader.sampler) for loader in loaders] == [3, 3, 4]
+
+
+@pytest.mark.parametrize("depth", [0, 2])
+def test_prefetcher_yields_every_batch_in_order(depth):
+    """
+    Test that prefetched batches match the loader's, sync or background
+    """
+    images = torch.arange(10, dtype=torch.float32).view(10, 1, 1, 1)
+    loader = TensorBatchLoader(images, torch.arange(10), batch_size=3)
+    prefetcher = DevicePrefetcher(loader, "cpu", depth=depth)
+
+    for _ in range(2):
+        targets = [target.tolist() for _, target in prefetcher]
+        assert targets == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+        assert prefetcher.batches == 4
+        assert prefetcher.wait_seconds >= 0
+    assert len(prefetcher) == 4
+    assert len(prefetcher.dataset) == 10
+
+
+def test_prefetcher_stops_early_and_reraises():
+    """
+    Test that breaking out of a pass stops the producer thread and that
+    loader errors reach the caller
+    """
+    images = torch.zeros(100, 1, 1, 1)
+    loader = TensorBatchLoader(images, torch.zeros(100), batch_size=1)
+    prefetcher = DevicePrefetcher(loader, "cpu", depth=1)
+    for i, _ in enumerate(prefetcher):
+        if i == 2:
+            break
+    assert prefetcher.batches == 3
+
+    class Broken(TensorBatchLoader):
+        def _batches(self):
+            yield from super()._batches()
+            raise OSError("disk gone")
+
+    prefetcher = DevicePrefetcher(
+        Broken(images, torch.zeros(100), batch_size=50), "cpu", depth=2)
+    with pytest.raises(OSError):
+        list(prefetcher)
+
+
+def test_worker_only_options_are_dropped_without_workers():
+    """
+    Test that options DataLoader rejects without workers are left out
+    """
+    assert loader_options(0, persistent_workers=True, prefetch_factor=4) == {
+        "num_workers": 0, "pin_memory": False}
+    options = loader_options(2, persistent_workers=True, prefetch_factor=4)
+    assert options["persistent_workers"] is True
+    assert options["prefetch_factor"] == 4
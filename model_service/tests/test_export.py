@@ -0,0 +1,119 @@
+import sys
+from unittest import mock
+import pytest
+import torch
+from model_service.src import export
+from model_service.src.model import MNISTCNN
+from model_service.src.export import (
+    EXPORT_MODES,
+    export_model,
+    load_float_model,
+    variant_path
+)
+from model_service.src.utils.model_loader import (
+    InferenceBackend,
+    load_backend,
+    load_model,
+    load_torchscript,
+    warm_up
+)
+
+TORCHSCRIPT_MODES = tuple(mode for mode in EXPORT_MODES if mode != "onnx")
+
+
+@pytest.fixture(scope="module")
+def checkpoint(tmp_path_factory):
+    path = tmp_path_factory.mktemp("export") / "model.pth"
+    torch.manual_seed(0)
+    torch.save(MNISTCNN().state_dict(), path)
+    return str(path)
+
+
+@pytest.mark.parametrize("mode", TORCHSCRIPT_MODES)
+def test_exported_variants_round_trip(checkpoint, tmp_path, mode):
+    """
+    Every export mode is detected by model_loader.load_model and stays
+    close to the float model's outputs.
+    """
+    calibration = [(torch.randn(32, 1, 28, 28), None) for _ in range(2)]
+    export_path = variant_path(str(tmp_path / "exported_model.pt"), mode)
+    export_model(checkpoint, export_path, torch.device("cpu"), mode,
+                 calibration)
+
+    _, variant = load_torchscript(export_path)
+    model = load_model(export_path)
+    inputs = torch.randn(4, 1, 28, 28)
+    expected = load_float_model(checkpoint, torch.device("cpu"))(inputs)
+    with torch.no_grad():
+        outputs = model(inputs)
+
+    assert variant["mode"] == mode
+    assert outputs.shape == (4, 10)
+    tolerance = 0.05 if mode.endswith("int8") else 1e-4
+    assert torch.allclose(outputs, expected, atol=tolerance)
+
+
+def test_onnx_export_served_by_onnxruntime(checkpoint, tmp_path):
+    """
+    The ONNX export accepts any batch size and the onnxruntime backend
+    returns the same probabilities as the float model.
+    """
+    pytest.importorskip("onnxruntime")
+    export_path = variant_path(str(tmp_path / "exported_model.pt"), "onnx")
+    export_model(checkpoint, export_path, torch.device("cpu"), "onnx")
+
+    backend = load_backend(export_path, "onnxruntime")
+    inputs = torch.randn(7, 1, 28, 28)
+    expected = torch.softmax(
+        load_float_model(checkpoint, torch.device("cpu"))(inputs), dim=1)
+    probabilities = backend.predict(inputs.numpy())
+
+    assert export_path.endswith(".onnx")
+    assert probabilities.shape == (7, 10)
+    assert torch.allclose(
+        torch.from_numpy(probabilities), expected, atol=1e-5)
+
+
+def test_warm_up_runs_every_batch_size(checkpoint, tmp_path):
+    """
+    warm_up runs the requested iterations at each batch size and reports
+    their latencies.
+    """
+    export_path = variant_path(str(tmp_path / "exported_model.pt"), "script")
+    export_model(checkpoint, export_path, torch.device("cpu"), "script")
+
+    timings = warm_up(load_backend(export_path), [1, 8], iterations=2)
+
+    assert sorted(timings) == [1, 8]
+    assert all(len(t) == 2 and min(t) > 0 for t in timings.values())
+
+
+def test_backend_without_predict_fails_at_construction():
+    """
+    Test that a backend missing predict() cannot be created, rather than
+    failing on its first request.
+    """
+    class Incomplete(InferenceBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_report_exports_on_cpu_even_with_cuda(checkpoint, tmp_path):
+    """
+    With --report, variants are exported on CPU, where the report
+    evaluates and times them, even when CUDA is available.
+    """
+    argv = ["export", "--checkpoint", checkpoint, "--report",
+            "--export-path", str(tmp_path / "exported_model.pt")]
+    with mock.patch.object(sys, "argv", argv), \
+            mock.patch("torch.cuda.is_available", return_value=True), \
+            mock.patch("src.data_loader.get_data_loaders",
+                       return_value=(None, None)), \
+            mock.patch.object(export, "export_model") as export_model_mock, \
+            mock.patch.object(export, "report_variants"):
+        export.main()
+
+    device = export_model_mock.call_args.args[2]
+    assert device == torch.device("cpu")
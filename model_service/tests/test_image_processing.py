@@ -0,0 +1,51 @@
+import io
+import numpy as np
+from PIL import Image
+import pytest
+from model_service.src.utils.image_processing import (
+    MNIST_MEAN,
+    MNIST_STD,
+    normalise_batch,
+    preprocess_image
+)
+
+
+def reference(pixels: np.ndarray) -> np.ndarray:
+    inverted = (255 - pixels.astype(np.float32)) / 255.0
+    return (inverted - MNIST_MEAN) / MNIST_STD
+
+
+def random_pixels(seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).integers(
+        0, 256, size=(28, 28), dtype=np.uint8)
+
+
+def test_png_matches_reference_normalisation():
+    pixels = random_pixels()
+    buffered = io.BytesIO()
+    Image.fromarray(pixels, mode="L").save(buffered, format="PNG")
+
+    normalised = preprocess_image(buffered.getvalue())
+
+    assert normalised.shape == (1, 28, 28)
+    assert normalised.dtype == np.float32
+    assert np.allclose(normalised[0], reference(pixels), atol=1e-6)
+
+
+def test_raw_grayscale_bytes_skip_image_decoding():
+    pixels = random_pixels(1)
+    normalised = preprocess_image(pixels.tobytes())
+    assert np.allclose(normalised[0], reference(pixels), atol=1e-6)
+
+
+def test_normalise_batch_is_vectorised_over_images():
+    batch = np.stack([random_pixels(i) for i in range(4)])
+    normalised = normalise_batch(batch)
+    assert normalised.shape == (4, 1, 28, 28)
+    for i in range(4):
+        assert np.allclose(normalised[i, 0], reference(batch[i]), atol=1e-6)
+
+
+def test_undecodable_bytes_raise_value_error():
+    with pytest.raises(ValueError):
+        preprocess_image(b"\x89PNG\r\n\x1a\n truncated")
@@ -0,0 +1,38 @@
+import threading
+from model_service.src.utils.metrics import Counter, Histogram
+
+
+def test_histogram_merges_observations_from_every_thread():
+    """
+    Observations recorded on separate threads land in per-thread shards
+    and are summed into cumulative buckets when rendered.
+    """
+    histogram = Histogram("test_seconds", "Test.", "stage", buckets=(0.1, 1))
+
+    def observe():
+        for _ in range(100):
+            histogram.observe("forward", 0.05)
+            histogram.observe("forward", 0.5)
+
+    threads = [threading.Thread(target=observe) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    histogram.observe("forward", 5)
+
+    lines = list(histogram.render())
+    assert 'test_seconds_bucket{stage="forward",le="0.1"} 400' in lines
+    assert 'test_seconds_bucket{stage="forward",le="1"} 800' in lines
+    assert 'test_seconds_bucket{stage="forward",le="+Inf"} 801' in lines
+    assert 'test_seconds_count{stage="forward"} 801' in lines
+
+
+def test_counter_renders_one_series_per_label():
+    counter = Counter("test_total", "Test.", "error_type")
+    counter.inc("none")
+    counter.inc("none")
+    counter.inc("validation_error")
+
+    assert counter.values() == {"none": 2, "validation_error": 1}
+    assert 'test_total{error_type="none"} 2' in list(counter.render())
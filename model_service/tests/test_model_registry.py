@@ -0,0 +1,162 @@
+import asyncio
+import os
+from fastapi.testclient import TestClient
+import pytest
+import torch
+from unittest import mock
+from model_service.src.app import app
+from model_service.src.model import MNISTCNN
+from model_service.src.export import export_model
+from model_service.src.utils.model_registry import ModelRegistry
+from model_service.src.utils.prediction_cache import PredictionCache
+
+
+@pytest.fixture(scope="module")
+def registry_dir(tmp_path_factory):
+    """
+    A registry directory holding two exports of different weights, the
+    second one newer.
+    """
+    directory = tmp_path_factory.mktemp("registry")
+    for seed, name in enumerate(("old.pt", "new.pt")):
+        torch.manual_seed(seed)
+        checkpoint = str(directory / f"weights{seed}.pth")
+        torch.save(MNISTCNN().state_dict(), checkpoint)
+        export_model(checkpoint, str(directory / name), torch.device("cpu"))
+        os.utime(directory / name, (1000 + seed, 1000 + seed))
+    return str(directory)
+
+
+@pytest.fixture
+def admin_client():
+    """
+    A client sending the admin token the service is configured with.
+    """
+    with mock.patch("src.routers.admin.settings.admin_token", "secret"):
+        yield TestClient(app, headers={"X-Admin-Token": "secret"})
+
+
+def make_registry(directory):
+    return ModelRegistry(directory, warmup_batch_sizes=(1,),
+                         warmup_iterations=1)
+
+
+def test_newest_export_is_published_and_pins_are_honoured(registry_dir):
+    registry = make_registry(registry_dir)
+    published = []
+    old, new = sorted(registry.scan(), key=lambda e: e.modified)
+
+    asyncio.run(registry.sync(published.append))
+    assert [m.version for m in published] == [new.version]
+
+    # Already serving the wanted version: nothing to reload
+    asyncio.run(registry.sync(published.append))
+    assert len(published) == 1
+
+    registry.pinned = old.version
+    asyncio.run(registry.sync(published.append))
+    assert published[-1].version == old.version
+    assert registry.active.version == old.version
+
+
+def test_broken_export_is_skipped(registry_dir, tmp_path):
+    directory = tmp_path / "registry"
+    directory.mkdir()
+    good = os.path.join(registry_dir, "old.pt")
+    (directory / "good.pt").write_bytes(open(good, "rb").read())
+    (directory / "broken.pt").write_bytes(b"not a model")
+    os.utime(directory / "good.pt", (1000, 1000))
+    registry = make_registry(str(directory))
+    published = []
+
+    asyncio.run(registry.sync(published.append))
+    asyncio.run(registry.sync(published.append))
+
+    errors = {m["path"]: m["error"] for m in registry.describe()}
+    assert len(published) == 1
+    assert published[0].version == registry.active.version
+    assert errors[str(directory / "broken.pt")] is not None
+
+
+def test_admin_endpoints_pin_and_unpin_versions(registry_dir, admin_client):
+    """
+    Pinning swaps the served model before returning, and predictions
+    report the version that produced them.
+    """
+    client = admin_client
+    registry = make_registry(registry_dir)
+    old, new = sorted(registry.scan(), key=lambda e: e.modified)
+    with mock.patch.object(app.state, "registry", registry), \
+            mock.patch.object(app.state, "model", app.state.model), \
+            mock.patch.object(app.state, "model_version", None), \
+            mock.patch.object(
+                app.state, "prediction_cache", PredictionCache()):
+        models = client.get("/admin/models").json()["models"]
+        assert [m["version"] for m in models] == [new.version, old.version]
+
+        response = client.put(f"/admin/models/pin/{old.version}")
+        assert response.json()["active_version"] == old.version
+        prediction = client.post(
+            "/predict", content=bytes(784),
+            headers={"Content-Type": "application/octet-stream"})
+        assert prediction.json()["model_version"] == old.version
+
+        response = client.delete("/admin/models/pin")
+        assert response.json()["active_version"] == new.version
+        assert response.json()["pinned_version"] is None
+
+        assert client.put("/admin/models/pin/unknown").status_code == 404
+
+
+def test_pinning_a_broken_export_is_a_conflict(
+        registry_dir, tmp_path, admin_client):
+    """
+    A pinned version that fails to load answers 409 and leaves the served
+    model and the previous pin in place.
+    """
+    directory = tmp_path / "registry"
+    directory.mkdir()
+    good = os.path.join(registry_dir, "old.pt")
+    (directory / "good.pt").write_bytes(open(good, "rb").read())
+    (directory / "broken.pt").write_bytes(b"not a model")
+    os.utime(directory / "broken.pt", (1000, 1000))
+    client = admin_client
+    registry = make_registry(str(directory))
+    broken = next(e for e in registry.scan()
+                  if e.path.endswith("broken.pt"))
+    with mock.patch.object(app.state, "registry", registry), \
+            mock.patch.object(app.state, "model", app.state.model), \
+            mock.patch.object(app.state, "model_version", None), \
+            mock.patch.object(
+                app.state, "prediction_cache", PredictionCache()):
+        active = client.get("/admin/models").json()["active_version"]
+
+        response = client.put(f"/admin/models/pin/{broken.version}")
+        assert response.status_code == 409
+        assert response.headers["X-Error-Type"] == "model_error"
+        assert registry.pinned is None
+
+        models = client.get("/admin/models").json()
+        assert models["active_version"] == active
+        errors = {m["version"]: m["error"] for m in models["models"]}
+        assert errors[broken.version] is not None
+
+
+def test_admin_endpoints_require_registry(admin_client):
+    assert admin_client.get("/admin/models").status_code == 404
+
+
+def test_admin_endpoints_are_disabled_without_a_token():
+    client = TestClient(app)
+    with mock.patch("src.routers.admin.settings.admin_token", ""):
+        response = client.get(
+            "/admin/models", headers={"X-Admin-Token": ""})
+    assert response.status_code == 403
+    assert response.headers["X-Error-Type"] == "auth_error"
+
+
+def test_admin_endpoints_reject_a_wrong_token(admin_client):
+    for headers in ({"X-Admin-Token": "wrong"}, {"X-Admin-Token": ""}):
+        response = admin_client.get("/admin/models", headers=headers)
+        assert response.status_code == 401
+        assert response.headers["X-Error-Type"] == "auth_error"
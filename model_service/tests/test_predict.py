@@ -4,6 +4,7 @@ from PIL import Image
 from fastapi.testclient import TestClient
 import pytest
 from model_service.src.app import app
+from model_service.src.utils.model_loader import TorchBackend
 from unittest import mock
 import torch
 
@@ -16,10 +17,10 @@ class MockModel(mock.MagicMock):
         self.dummy_param = torch.nn.Parameter(torch.zeros(1))
 
     def __call__(self, x):
-        # Return a tensor with 10 outputs (one for each digit)
+        # Return a tensor with 10 outputs (one for each digit) per image
         return torch.tensor(
             [[0.1, 0.1, 0.1, 0.1, 0.1, 0.9, 0.1, 0.1, 0.1, 0.1]]
-        )
+        ).repeat(x.size(0), 1)
 
     def to(self, device):
         # Simply return self to simulate device movement
@@ -44,12 +45,12 @@ with mock.patch(
 ):
 
     # Explicitly set the model in app state
-    app.state.model = mock_model
+    app.state.model = TorchBackend(mock_model)
 
 client = TestClient(app)
 
 
-def create_test_image() -> str:
+def create_test_image(color: int = 255) -> str:
     """
     Creates a 28x28 grayscale test image, converts it to a base64 string,
     and returns a data URI.
@@ -57,8 +58,8 @@ def create_test_image() -> str:
     Usage:
         image_data = create_test_image()
     """
-    # Create a white 28x28 grayscale image
-    image = Image.new("L", (28, 28), color=255)
+    # Create a plain 28x28 grayscale image, white by default
+    image = Image.new("L", (28, 28), color=color)
     buffered = io.BytesIO()
     image.save(buffered, format="PNG")
     img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
@@ -75,7 +76,7 @@ def test_predict_valid_image():
     """
     image_data = create_test_image()
     payload = {"image_data": image_data}
-    response = client.post("/predict/predict", json=payload)
+    response = client.post("/predict", json=payload)
     assert response.status_code == 200, (
         f"Expected 200, got {response.status_code}")
     data = response.json()
@@ -94,7 +95,7 @@ def test_predict_invalid_base64():
     Expect a 400 response indicating a processing error.
     """
     payload = {"image_data": "not_a_valid_base64_string"}
-    response = client.post("/predict/predict", json=payload)
+    response = client.post("/predict", json=payload)
     assert response.status_code == 400, (
         f"Expected 400, got {response.status_code}"
     )
@@ -108,12 +109,229 @@ def test_predict_missing_field():
     Expect a 422 Unprocessable Entity error.
     """
     payload = {}
-    response = client.post("/predict/predict", json=payload)
+    response = client.post("/predict", json=payload)
     assert response.status_code == 422, (
         f"Expected 422, got {response.status_code}"
     )
 
 
+def test_predict_reports_batching_stats():
+    """
+    Test that /predict runs through the micro-batcher and that its batch
+    statistics are exposed on /stats.
+    """
+    before = client.get("/stats").json()["batching"]["items"]
+    # An image no other test sends, so the cache cannot answer it
+    payload = {"image_data": create_test_image(color=254)}
+    response = client.post("/predict", json=payload)
+    assert response.status_code == 200, (
+        f"Expected 200, got {response.status_code}")
+    assert response.json()["prediction"] == "5"
+    stats = client.get("/stats").json()["batching"]
+    assert stats["items"] == before + 1
+    assert "p95" in stats["queue_wait_ms"]
+
+
+def test_predict_batch_mixed_images():
+    """
+    Test the /predict/batch endpoint with a mix of valid and invalid images.
+    Valid images get predictions; the invalid one gets a per-item error
+    without failing the batch.
+    """
+    image_data = create_test_image()
+    payload = {"images": [image_data, "not_a_valid_image", image_data]}
+    response = client.post("/predict/batch", json=payload)
+    assert response.status_code == 200, (
+        f"Expected 200, got {response.status_code}")
+    results = response.json()["results"]
+    assert [item["index"] for item in results] == [0, 1, 2]
+    assert results[0]["result"]["prediction"] == "5"
+    assert results[2]["result"]["prediction"] == "5"
+    assert results[1]["result"] is None
+    assert results[1]["error"]["error_type"] in (
+        "validation_error", "processing_error")
+
+
+def test_predict_batch_empty():
+    """
+    Test the /predict/batch endpoint with an empty list of images.
+    Expect a 422 Unprocessable Entity error.
+    """
+    response = client.post("/predict/batch", json={"images": []})
+    assert response.status_code == 422, (
+        f"Expected 422, got {response.status_code}"
+    )
+
+
+def test_predict_saturated_executor_returns_503():
+    """
+    Test that /predict sheds load with a 503 and a Retry-After header when
+    the preprocessing executor has no free slots.
+    """
+    payload = {"image_data": create_test_image()}
+    with mock.patch.object(app.state.executor, "max_pending", 0):
+        response = client.post("/predict", json=payload)
+    assert response.status_code == 503, (
+        f"Expected 503, got {response.status_code}")
+    assert "retry-after" in response.headers
+    assert response.json()["error_type"] == "server_error"
+
+
+def test_predict_raw_octet_stream():
+    """
+    Test the /predict endpoint with 784 raw grayscale bytes sent as
+    application/octet-stream instead of base64 JSON.
+    """
+    response = client.post(
+        "/predict",
+        content=bytes(28 * 28),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert response.status_code == 200, (
+        f"Expected 200, got {response.status_code}")
+    assert response.json()["prediction"] == "5"
+
+
+@pytest.mark.parametrize("signature", [b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff"])
+def test_predict_raw_pixels_that_look_like_an_image_header(signature):
+    """
+    Test that raw pixels starting with a PNG or JPEG signature are still
+    taken as pixels, as they are by /predict/batch.
+    """
+    frame = signature + bytes(28 * 28 - len(signature))
+    for path in ("/predict", "/predict/batch"):
+        response = client.post(
+            path,
+            content=frame,
+            headers={"Content-Type": "application/octet-stream"}
+        )
+        assert response.status_code == 200, (
+            f"Expected 200 from {path}, got {response.status_code}")
+
+
+def test_predict_raw_wrong_length():
+    """
+    Test that a raw body that is not 784 bytes is rejected with a 400.
+    """
+    response = client.post(
+        "/predict",
+        content=bytes(100),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert response.status_code == 400, (
+        f"Expected 400, got {response.status_code}")
+    assert response.json()["error_type"] == "validation_error"
+
+
+def test_predict_batch_raw_frame():
+    """
+    Test the /predict/batch endpoint with a packed frame of three raw images.
+    """
+    response = client.post(
+        "/predict/batch",
+        content=bytes(3 * 28 * 28),
+        headers={"Content-Type": "application/octet-stream"}
+    )
+    assert response.status_code == 200, (
+        f"Expected 200, got {response.status_code}")
+    results = response.json()["results"]
+    assert len(results) == 3
+    assert all(item["result"]["prediction"] == "5" for item in results)
+
+
+def test_predict_repeated_image_served_from_cache():
+    """
+    Test that resubmitting an identical image is answered from the
+    prediction cache without another forward pass.
+    """
+    pixels = bytes(range(256)) * 3 + bytes(16)
+    headers = {"Content-Type": "application/octet-stream"}
+    first = client.post("/predict", content=pixels, headers=headers)
+    items_before = client.get("/stats").json()["batching"]["items"]
+    hits_before = client.get("/stats").json()["cache"]["hits"]
+
+    second = client.post("/predict", content=pixels, headers=headers)
+    stats = client.get("/stats").json()
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert stats["batching"]["items"] == items_before
+    assert stats["cache"]["hits"] == hits_before + 1
+
+
+def test_health_live_and_ready():
+    """
+    Test that liveness always answers and readiness reports the warmed
+    model.
+    """
+    assert client.get("/health/live").status_code == 200
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_health_ready_is_503_while_model_loads():
+    """
+    Test that readiness fails until a model has been published.
+    """
+    with mock.patch.object(app.state, "model", None):
+        response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+    assert client.get("/health/live").status_code == 200
+
+
+def request_count(error_type: str) -> float:
+    """
+    Current value of model_service_requests_total for an error type.
+    """
+    series = f'model_service_requests_total{{error_type="{error_type}"}}'
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.split()[-1])
+    return 0.0
+
+
+def test_metrics_exposes_stage_latencies_and_error_counts():
+    """
+    Test that /metrics reports pipeline stage histograms and counts
+    requests by error type in the Prometheus text format, with bad client
+    input counted as a validation error rather than a server error.
+    """
+    server_errors = request_count("server_error")
+    validation_errors = request_count("validation_error")
+    client.post("/predict", json={"image_data": create_test_image()})
+    invalid = client.post("/predict", json={"image_data": "not an image"})
+    assert invalid.status_code == 400
+    assert invalid.headers["X-Error-Type"] == "validation_error"
+
+    response = client.get("/metrics")
+    body = response.text
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for stage in ("validation", "base64_decode", "image_decode", "resize",
+                  "normalise", "device_transfer", "forward", "serialise"):
+        assert f'model_service_stage_seconds_count{{stage="{stage}"}}' in body
+    assert 'model_service_requests_total{error_type="none"}' in body
+    assert request_count("validation_error") == validation_errors + 1
+    assert request_count("server_error") == server_errors
+
+
+def test_metrics_only_count_prediction_requests():
+    """
+    Test that errors from other routes, like the admin endpoints, are not
+    counted as prediction outcomes, while a malformed /predict body is.
+    """
+    error_types = ("server_error", "validation_error", "auth_error")
+    before = {name: request_count(name) for name in error_types}
+    assert client.get("/admin/models").status_code in (401, 403, 404)
+    assert client.get("/no-such-route").status_code == 404
+    assert {name: request_count(name) for name in error_types} == before
+
+    assert client.post("/predict", json={}).status_code == 422
+    assert request_count("validation_error") == (
+        before["validation_error"] + 1)
+
+
 if __name__ == "__main__":
     # To run tests manually, execute:
     # $ pytest --maxfail=1 --disable-warnings -q
@@ -0,0 +1,87 @@
+from unittest import mock
+import numpy as np
+from model_service.src.utils import prediction_cache
+from model_service.src.utils.prediction_cache import PredictionCache
+
+
+def key(value: int) -> bytes:
+    return PredictionCache.make_key(np.full((28, 28), value, dtype=np.uint8))
+
+
+def test_keys_depend_on_pixel_content():
+    assert key(1) == key(1)
+    assert key(1) != key(2)
+
+
+def test_hit_and_miss_counters():
+    cache = PredictionCache(max_entries=4)
+    assert cache.get(key(1), "v1") is None
+    cache.put(key(1), "v1", "one")
+    assert cache.get(key(1), "v1") == "one"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2)
+    cache.put(key(1), "v1", "one")
+    cache.put(key(2), "v1", "two")
+    cache.get(key(1), "v1")
+    cache.put(key(3), "v1", "three")
+    assert cache.get(key(2), "v1") is None
+    assert cache.get(key(1), "v1") == "one"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(max_entries=2, ttl_seconds=10)
+    with mock.patch.object(prediction_cache.time, "monotonic") as monotonic:
+        monotonic.return_value = 100.0
+        cache.put(key(1), "v1", "one")
+        monotonic.return_value = 111.0
+        assert cache.get(key(1), "v1") is None
+
+
+def test_model_change_invalidates_entries():
+    cache = PredictionCache(max_entries=2)
+    cache.put(key(1), "v1", "one")
+    assert cache.get(key(1), "v2") is None
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_zero_size_disables_cache():
+    cache = PredictionCache(max_entries=0)
+    cache.put(key(1), "v1", "one")
+    assert cache.get(key(1), "v1") is None
+
+
+def test_late_results_from_swapped_out_model_are_not_stored():
+    cache = PredictionCache(max_entries=2)
+    cache.get(key(1), "v1")
+    cache.get(key(1), "v2")
+    cache.put(key(1), "v1", "stale")
+    assert cache.get(key(1), "v2") is None
+    cache.put(key(1), "v2", "fresh")
+    assert cache.get(key(1), "v2") == "fresh"
+
+
+def test_lookups_from_swapped_out_model_keep_new_entries():
+    cache = PredictionCache(max_entries=2)
+    cache.get(key(1), "v1")
+    cache.put(key(1), "v2", "fresh")
+    # A request still running on v1 must not switch the cache back
+    assert cache.get(key(1), "v1") is None
+    assert cache.get(key(1), "v2") == "fresh"
+    cache.put(key(2), "v2", "also fresh")
+    assert cache.get(key(2), "v2") == "also fresh"
+
+
+def test_activate_restores_a_retired_version():
+    cache = PredictionCache(max_entries=2)
+    cache.put(key(1), "v1", "old")
+    cache.put(key(1), "v2", "new")
+    cache.activate("v1")
+    assert cache.get(key(1), "v1") is None
+    cache.put(key(1), "v1", "old again")
+    assert cache.get(key(1), "v1") == "old again"
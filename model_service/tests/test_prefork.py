@@ -0,0 +1,14 @@
+from unittest import mock
+from model_service.src.utils import prefork
+
+
+def test_threads_are_split_across_workers():
+    """
+    Workers divide the available cores between them, never dropping below
+    one thread, and an explicit thread count is kept as-is.
+    """
+    with mock.patch.object(prefork, "available_cpus", return_value=8):
+        assert prefork.threads_per_worker(1) == 8
+        assert prefork.threads_per_worker(4) == 2
+        assert prefork.threads_per_worker(16) == 1
+        assert prefork.threads_per_worker(4, configured=3) == 3
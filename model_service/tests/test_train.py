@@ -0,0 +1,204 @@
+import pytest
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+import torch.nn as nn
+from torch.nn.parallel import DistributedDataParallel
+from model_service.src.data_loader import (
+    TensorBatchLoader,
+    distributed_sampler,
+    evaluation_sampler
+)
+from model_service.src.model import MNISTCNN
+from model_service.src.train import (
+    broadcast_flag,
+    make_loss_fn,
+    set_epoch,
+    train,
+    validate
+)
+
+
+def test_channels_last_loss_matches_default():
+    """
+    Test that the channels-last step computes the same outputs and loss
+    """
+    torch.manual_seed(0)
+    model = MNISTCNN()
+    data, target = torch.randn(8, 1, 28, 28), torch.randint(0, 10, (8,))
+    criterion = nn.CrossEntropyLoss()
+
+    outputs, loss = make_loss_fn(model, criterion)(data, target)
+    model = model.to(memory_format=torch.channels_last)
+    cl_outputs, cl_loss = make_loss_fn(
+        model, criterion, channels_last=True)(data, target)
+
+    assert torch.allclose(outputs, cl_outputs, atol=1e-5)
+    assert torch.allclose(loss, cl_loss, atol=1e-5)
+
+
+def test_bf16_step_keeps_float32_loss_and_weights():
+    """
+    Test that bf16 autocast trains float32 weights from a float32 loss
+    """
+    torch.manual_seed(0)
+    model = MNISTCNN()
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    data, target = torch.randn(4, 1, 28, 28), torch.randint(0, 10, (4,))
+    loss_fn = make_loss_fn(model, criterion, bf16=True)
+
+    outputs, loss = loss_fn(data, target)
+    assert outputs.dtype == torch.bfloat16
+    assert loss.dtype == torch.float32
+
+    before = model.fc2.weight.detach().clone()
+    loader = TensorBatchLoader(data, target, batch_size=4)
+    train(model, "cpu", loader, optimizer, criterion, loss_fn)
+    assert model.fc2.weight.dtype == torch.float32
+    assert not torch.equal(before, model.fc2.weight)
+
+
+def test_gradient_accumulation_matches_one_large_batch():
+    """
+    Test that accumulating two batches of 4 takes the same optimizer step
+    as one batch of 8, and that the epoch loss is the per-sample mean
+    """
+    images, targets = make_batch(8)
+    criterion = nn.CrossEntropyLoss()
+    weights, losses = [], []
+    for batch_size, steps in ((8, 1), (4, 2)):
+        torch.manual_seed(0)
+        model = MNISTCNN()
+        optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+        loader = TensorBatchLoader(images, targets, batch_size=batch_size)
+        losses.append(train(model, "cpu", loader, optimizer, criterion,
+                            accumulation_steps=steps))
+        weights.append(model.fc2.weight.detach())
+
+    assert torch.allclose(weights[0], weights[1], atol=1e-6)
+    assert losses[0] == pytest.approx(losses[1], rel=1e-5)
+
+
+def _distributed_worker(rank, world_size, store, results):
+    dist.init_process_group(
+        "gloo", init_method=f"file://{store}",
+        rank=rank, world_size=world_size)
+    torch.manual_seed(0)
+    model = MNISTCNN()
+    criterion = nn.CrossEntropyLoss()
+    images, targets = make_batch(12)
+
+    # An odd number of test images, so the shards differ in size
+    valid_loader = TensorBatchLoader(*make_batch(11), batch_size=4)
+    valid_loader.sampler = evaluation_sampler(
+        valid_loader.dataset, world_size, rank)
+    validation = validate(model, "cpu", valid_loader, criterion)
+
+    loader = TensorBatchLoader(images, targets, batch_size=4)
+    loader.sampler = distributed_sampler(
+        loader.dataset, world_size, rank, shuffle=True)
+    set_epoch(loader, 1)
+
+    ddp_model = DistributedDataParallel(model)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    train(ddp_model, "cpu", loader, optimizer, criterion)
+    weights = [torch.empty_like(model.fc2.weight) for _ in range(world_size)]
+    dist.all_gather(weights, model.fc2.weight.detach())
+    stop = broadcast_flag(rank == 0)
+
+    if rank == 0:
+        in_sync = all(torch.equal(weights[0], w) for w in weights)
+        torch.save((validation, in_sync, stop), results)
+    dist.destroy_process_group()
+
+
+def _accumulation_worker(rank, world_size, store, results):
+    dist.init_process_group(
+        "gloo", init_method=f"file://{store}",
+        rank=rank, world_size=world_size)
+    torch.manual_seed(0)
+    model = MNISTCNN()
+    loader = rank_loader(rank, world_size)
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    train(DistributedDataParallel(model), "cpu", loader, optimizer,
+          nn.CrossEntropyLoss(), accumulation_steps=2)
+    weights = [torch.empty_like(model.fc2.weight) for _ in range(world_size)]
+    dist.all_gather(weights, model.fc2.weight.detach())
+
+    if rank == 0:
+        in_sync = all(torch.equal(weights[0], w) for w in weights)
+        torch.save((model.state_dict(), in_sync), results)
+    dist.destroy_process_group()
+
+
+def rank_loader(rank, world_size):
+    # Five batches of 2 per rank: two full groups of 2 and one of 1
+    loader = TensorBatchLoader(*make_batch(20), batch_size=2)
+    loader.sampler = distributed_sampler(
+        loader.dataset, world_size, rank, shuffle=False)
+    return loader
+
+
+def make_batch(n):
+    generator = torch.Generator().manual_seed(1)
+    return (torch.randn(n, 1, 28, 28, generator=generator),
+            torch.randint(0, 10, (n,), generator=generator))
+
+
+def test_distributed_metrics_match_single_process(tmp_path):
+    """
+    Test that two gloo processes validating their own shards report the
+    metrics of one process validating everything, and stay in sync
+    """
+    results = str(tmp_path / "results.pt")
+    mp.start_processes(
+        _distributed_worker,
+        args=(2, str(tmp_path / "store"), results),
+        nprocs=2,
+        start_method="fork",
+    )
+    (valid_loss, accuracy), in_sync, stop = torch.load(results)
+
+    torch.manual_seed(0)
+    images, targets = make_batch(11)
+    expected_loss, expected_accuracy = validate(
+        MNISTCNN(), "cpu", TensorBatchLoader(images, targets, batch_size=4),
+        nn.CrossEntropyLoss())
+    assert valid_loss == pytest.approx(expected_loss, rel=1e-5)
+    assert accuracy == pytest.approx(expected_accuracy)
+    assert in_sync
+    assert stop
+
+
+def test_distributed_accumulation_syncs_the_final_partial_group(tmp_path):
+    """
+    Test that under DDP an epoch ending mid-accumulation still all-reduces
+    its last gradients and averages them over the batches it had
+    """
+    results = str(tmp_path / "results.pt")
+    mp.start_processes(
+        _accumulation_worker,
+        args=(2, str(tmp_path / "store"), results),
+        nprocs=2,
+        start_method="fork",
+    )
+    state, in_sync = torch.load(results)
+
+    torch.manual_seed(0)
+    model = MNISTCNN()
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.1)
+    criterion = nn.CrossEntropyLoss()
+    batches = [list(rank_loader(rank, 2)) for rank in range(2)]
+    for group in ([0, 1], [2, 3], [4]):
+        for rank_batches in batches:
+            for i in group:
+                data, target = rank_batches[i]
+                loss = criterion(model(data), target)
+                (loss / len(group) / len(batches)).backward()
+        optimizer.step()
+        optimizer.zero_grad()
+
+    assert in_sync
+    for name, value in model.state_dict().items():
+        assert torch.allclose(state[name], value, atol=1e-6), name
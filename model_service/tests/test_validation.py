@@ -0,0 +1,59 @@
+import base64
+import io
+from unittest import mock
+from PIL import Image
+from fastapi import HTTPException
+import pytest
+from model_service.src.utils import validation
+from model_service.src.utils.validation import validate_image_data
+
+
+def png_bytes() -> bytes:
+    buffered = io.BytesIO()
+    Image.new("L", (28, 28), color=255).save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def test_data_uri_is_decoded_once():
+    """
+    A valid data URI returns the sniffed format and the decoded bytes, with
+    one small header decode and one full decode.
+    """
+    raw = png_bytes()
+    image_data = "data:image/png;base64," + base64.b64encode(raw).decode()
+    with mock.patch.object(
+        validation.base64, "b64decode", wraps=base64.b64decode
+    ) as b64decode:
+        image_format, image_bytes = validate_image_data(image_data)
+    assert image_format == "png"
+    assert image_bytes == raw
+    assert b64decode.call_count == 2
+
+
+def test_raw_base64_format_is_sniffed():
+    raw = png_bytes()
+    image_format, image_bytes = validate_image_data(
+        base64.b64encode(raw).decode())
+    assert image_format == "png"
+    assert image_bytes == raw
+
+
+def test_oversized_payload_rejected_before_decode():
+    image_data = "data:image/png;base64," + "A" * (14 * 1024 * 1024)
+    with mock.patch.object(validation.base64, "b64decode") as b64decode:
+        with pytest.raises(HTTPException) as exc_info:
+            validate_image_data(image_data)
+    assert exc_info.value.status_code == 413
+    b64decode.assert_not_called()
+
+
+def test_unsupported_declared_format():
+    with pytest.raises(HTTPException) as exc_info:
+        validate_image_data("data:image/gif;base64,R0lGODlh")
+    assert exc_info.value.status_code == 415
+
+
+def test_non_image_payload_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        validate_image_data(base64.b64encode(b"hello world!").decode())
+    assert exc_info.value.status_code == 400
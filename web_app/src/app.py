@@ -1,8 +1,18 @@
+from datetime import datetime, timedelta
 import streamlit as st
 from streamlit_drawable_canvas import st_canvas
-from utils.prediction_logger import log_prediction
+from utils.prediction_logger import log_prediction, predictions_settled
 from utils.client import send_prediction_request
-from utils.db import fetch_all_predictions
+from utils.db import (
+    estimate_prediction_count,
+    fetch_confusion_matrix,
+    fetch_digit_accuracy,
+    fetch_hourly_accuracy,
+    fetch_predictions_page,
+    fetch_predictions_since,
+    init_db,
+    use_pool
+)
 
 st.set_page_config(
     page_title="MNIST Digit Classifier",
@@ -15,8 +25,194 @@ if 'prediction' not in st.session_state:
 if 'predicted_digit' not in st.session_state:
     st.session_state.predicted_digit = "N/A"
 
+HISTORY_PAGE_SIZE = 20
+# Seconds a cached query result is reused. Writes from this process
+# invalidate it sooner; this bounds how stale other processes' writes get.
+QUERY_CACHE_TTL = 60
+# Accuracy panel time windows, as hours back from now
+ACCURACY_WINDOWS = {
+    "Last 24 hours": 24,
+    "Last 7 days": 24 * 7,
+    "Last 30 days": 24 * 30,
+    "All time": None,
+}
+
+
+@st.cache_resource
+def db_pool():
+    # One pool per server process, kept across reruns and module reloads
+    return init_db()
+
+
+# The cached queries below take `generation`, the number of predictions
+# this process has written or dropped, only as part of the cache key: a
+# write makes every later rerun miss the cache and see the new rows.
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=256)
+def cached_predictions_page(limit, before, generation):
+    return fetch_predictions_page(limit, before)
+
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=256)
+def cached_predictions_since(after, limit, generation):
+    return fetch_predictions_since(after, limit)
+
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=16)
+def cached_prediction_count(generation):
+    return estimate_prediction_count()
+
+
+@st.cache_data(ttl=QUERY_CACHE_TTL, max_entries=16)
+def cached_accuracy_stats(hours, generation):
+    since = None
+    if hours is not None:
+        since = datetime.now() - timedelta(hours=hours)
+    return (
+        fetch_hourly_accuracy(since),
+        fetch_digit_accuracy(since),
+        fetch_confusion_matrix(since),
+    )
+
+
+def accuracy(correct, total):
+    return float(correct) / total if total else 0.0
+
+
+def render_accuracy_panel():
+    """
+    Accuracy over time, per digit and as a confusion matrix, all read from
+    the hourly rollup rather than the predictions table.
+    """
+    st.subheader("Accuracy")
+    window = st.selectbox("Time window", list(ACCURACY_WINDOWS))
+    hourly, per_digit, matrix = cached_accuracy_stats(
+        ACCURACY_WINDOWS[window], predictions_settled())
+    total = sum(row[1] for row in hourly)
+    if not total:
+        st.info("No predictions logged in this time window.")
+        return
+
+    correct = sum(row[2] for row in hourly)
+    confidence = sum(row[3] for row in hourly)
+    cols = st.columns([1, 1, 1])
+    with cols[0]:
+        st.metric("Predictions", f"{total}")
+    with cols[1]:
+        st.metric("Accuracy", f"{accuracy(correct, total) * 100:.1f}%")
+    with cols[2]:
+        st.metric("Mean Confidence", f"{confidence / total * 100:.1f}%")
+
+    cols = st.columns([1, 1])
+    with cols[0]:
+        st.markdown("Accuracy by hour")
+        st.line_chart({
+            "hour": [row[0] for row in hourly],
+            "accuracy": [accuracy(row[2], row[1]) for row in hourly],
+        }, x="hour", y="accuracy")
+    with cols[1]:
+        st.markdown("Accuracy by true label")
+        st.bar_chart({
+            "digit": [str(row[0]) for row in per_digit],
+            "accuracy": [accuracy(row[2], row[1]) for row in per_digit],
+        }, x="digit", y="accuracy")
+
+    st.markdown("Confusion matrix (rows: true label, columns: predicted)")
+    st.dataframe(
+        {f"Predicted {d}": [row[d] for row in matrix] for d in range(10)},
+        use_container_width=True,
+    )
+
+
+def cursor(record):
+    # Keyset pagination position of a history row: (timestamp, id)
+    return record[1], record[0]
+
+
+def load_history():
+    """
+    Keep the prediction history in session state current: the newest page
+    on the first run, then only rows logged since the newest one shown.
+    """
+    generation = predictions_settled()
+    history = st.session_state.get("history")
+    if history:
+        newer = cached_predictions_since(
+            cursor(history[0]), HISTORY_PAGE_SIZE, generation)
+        if len(newer) < HISTORY_PAGE_SIZE:
+            st.session_state.history = list(newer) + history
+            return
+    # First run, or too many new rows to stitch on: start from the top
+    rows = cached_predictions_page(HISTORY_PAGE_SIZE, None, generation)
+    st.session_state.history = list(rows)
+    st.session_state.history_exhausted = len(rows) < HISTORY_PAGE_SIZE
+
+
+def add_pending(sequence, predicted_digit, confidence_score, true_label):
+    """
+    Show a just logged prediction at the top of the history until the
+    background writer has stored it, rather than wait for the write.
+    """
+    record = (None, datetime.now(), predicted_digit, confidence_score,
+              true_label)
+    st.session_state.pending_history = (
+        [(sequence, record)] + st.session_state.get("pending_history", []))
+
+
+def pending_history():
+    """
+    This session's logged predictions not yet settled, newest first. Once
+    written they come from the database with the rest of the history;
+    rows the writer gave up on are no longer shown.
+    """
+    settled = predictions_settled()
+    pending = [(sequence, record) for sequence, record
+               in st.session_state.get("pending_history", [])
+               if sequence > settled]
+    st.session_state.pending_history = pending
+    return [record for _, record in pending]
+
+
+def load_more_history():
+    history = st.session_state.history
+    rows = cached_predictions_page(
+        HISTORY_PAGE_SIZE, cursor(history[-1]), predictions_settled())
+    st.session_state.history = history + list(rows)
+    st.session_state.history_exhausted = len(rows) < HISTORY_PAGE_SIZE
+
+
+def render_prediction(record):
+    try:
+        dt = datetime.fromisoformat(record[1])
+    except Exception:
+        dt = record[1]
+    if isinstance(dt, datetime):
+        date_formatted = dt.strftime("%-d %b. %Y")
+        time_formatted = dt.strftime("%H:%M")
+    else:
+        date_formatted, time_formatted = record[1], ""
+    predicted_str = f"Predicted: {record[2]}"
+    actual_str = f"Actual: {record[4]}"
+    if record[2] == record[4]:
+        result = "Classified correctly"
+    else:
+        result = "Classified incorrectly"
+    conf_str = (
+        f"Confidence Score: {round(record[3] * 100, 0):.0f}%"
+    )
+    ts_formatted = f"**{date_formatted}** {time_formatted}: {result}"
+    with st.expander(label=f"{ts_formatted}", expanded=True):
+        cols = st.columns([1, 1, 1])
+        with cols[0]:
+            st.markdown(predicted_str)
+        with cols[1]:
+            st.markdown(actual_str)
+        with cols[2]:
+            st.markdown(conf_str)
+
 
 def main():
+    use_pool(db_pool())
     st.title("MNIST Digit Classifier")
     st.markdown(
         "This application allows you to draw a digit on the canvas and then "
@@ -89,13 +285,13 @@ def main():
                         st.session_state.predicted_digit in predictions
                     ):
                         # Log the prediction along with the true label
-                        log_prediction(
+                        row = (
                             int(st.session_state.predicted_digit),
                             predictions[st.session_state.predicted_digit]/100,
                             int(true_label)
                         )
-                        st.success(
-                            f"True Label accepted and logged: {true_label}")
+                        add_pending(log_prediction(*row), *row)
+                        st.success(f"True Label accepted: {true_label}")
                     else:
                         st.warning(
                             "No valid prediction to log. "
@@ -106,39 +302,20 @@ def main():
             else:
                 st.error("Invalid input. Please enter a digit from 0-9.")
 
-    # Display all logged predictions from the database
+    render_accuracy_panel()
+
+    # Display logged predictions from the database, newest first
     st.subheader("Logged Predictions")
-    predictions_table = fetch_all_predictions()
-    if predictions_table:
-        from datetime import datetime
-        for record in predictions_table:
-            try:
-                dt = datetime.fromisoformat(record[1])
-            except Exception:
-                dt = record[1]
-            if isinstance(dt, datetime):
-                date_formatted = dt.strftime("%-d %b. %Y")
-                time_formatted = dt.strftime("%H:%M")
-            else:
-                ts_formatted = record[1]
-            predicted_str = f"Predicted: {record[2]}"
-            actual_str = f"Actual: {record[4]}"
-            if record[2] == record[4]:
-                result = "Classified correctly"
-            else:
-                result = "Classified incorrectly"
-            conf_str = (
-                f"Confidence Score: {round(record[3] * 100, 0):.0f}%"
-            )
-            ts_formatted = f"**{date_formatted}** {time_formatted}: {result}"
-            with st.expander(label=f"{ts_formatted}", expanded=True):
-                cols = st.columns([1, 1, 1])
-                with cols[0]:
-                    st.markdown(predicted_str)
-                with cols[1]:
-                    st.markdown(actual_str)
-                with cols[2]:
-                    st.markdown(conf_str)
+    load_history()
+    history = pending_history() + st.session_state.history
+    if history:
+        st.caption(f"Showing {len(history)} of about "
+                   f"{cached_prediction_count(predictions_settled())} "
+                   "predictions")
+        for record in history:
+            render_prediction(record)
+        if not st.session_state.history_exhausted:
+            st.button("Load more", on_click=load_more_history)
     else:
         st.info("No predictions logged yet.")
 
@@ -1,62 +1,264 @@
-import requests
+import asyncio
 import base64
 import io
 import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import httpx
 from PIL import Image
 
 MODEL_SERVICE_URL = os.environ.get(
     "MODEL_SERVICE_URL", "http://localhost:8000/predict")
+# Send raw 28x28 pixels as application/octet-stream instead of base64 PNG
+MODEL_SERVICE_RAW_INPUT = os.environ.get(
+    "MODEL_SERVICE_RAW_INPUT", "false").lower() in ("1", "true", "yes")
+MODEL_SERVICE_TIMEOUT = float(
+    os.environ.get("MODEL_SERVICE_TIMEOUT", "5.0"))
+# Connections open to the model service at once, and how many of those
+# are kept alive between requests
+MODEL_SERVICE_MAX_CONNECTIONS = int(
+    os.environ.get("MODEL_SERVICE_MAX_CONNECTIONS", "20"))
+MODEL_SERVICE_MAX_KEEPALIVE = int(
+    os.environ.get("MODEL_SERVICE_MAX_KEEPALIVE", "10"))
+# Retries of a 503, waiting for Retry-After or else an exponential backoff
+# from MODEL_SERVICE_BACKOFF seconds. A longer Retry-After than
+# MODEL_SERVICE_MAX_RETRY_WAIT fails straight away rather than leave the
+# user waiting.
+MODEL_SERVICE_RETRIES = int(os.environ.get("MODEL_SERVICE_RETRIES", "2"))
+MODEL_SERVICE_BACKOFF = float(
+    os.environ.get("MODEL_SERVICE_BACKOFF", "0.25"))
+MODEL_SERVICE_MAX_RETRY_WAIT = float(
+    os.environ.get("MODEL_SERVICE_MAX_RETRY_WAIT", "5.0"))
+# HTTP/2 is negotiated over TLS, e.g. behind an HTTPS proxy
+MODEL_SERVICE_HTTP2 = os.environ.get(
+    "MODEL_SERVICE_HTTP2", "false").lower() in ("1", "true", "yes")
 
 
-def send_prediction_request(image_data) -> dict:
+def encode_image(image_data, raw: bool) -> dict:
     """
-    Sends a POST request with the base64-encoded image data to the model
-    service's prediction endpoint.
-    Returns the prediction result as a dictionary if the request is successful.
-    In case of error, returns a dictionary with an 'error' key.
+    Downscale canvas image data to a 28x28 grayscale image and build the
+    request body, either as base64-encoded PNG JSON or, with `raw`, as
+    the 784 raw grayscale pixel bytes.
     """
-    try:
-        # Convert numpy array to PIL Image
-        img = Image.fromarray(image_data.astype('uint8'))
+    # Convert numpy array to PIL Image
+    img = Image.fromarray(image_data.astype('uint8'))
 
-        # Convert to grayscale if it's not already
-        if img.mode != 'L':
-            img = img.convert('L')
+    # Convert to grayscale if it's not already
+    if img.mode != 'L':
+        img = img.convert('L')
 
-        # Resize to 28x28 (MNIST format)
-        img = img.resize((28, 28))
+    # Resize to 28x28 (MNIST format)
+    img = img.resize((28, 28))
 
-        # Convert to base64 for sending over HTTP
-        buffered = io.BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
+    if raw:
+        # Send the bare pixels, no image or base64 encoding needed
+        return {
+            "content": img.tobytes(),
+            "headers": {"Content-Type": "application/octet-stream"},
+        }
+    # Convert to base64 for sending over HTTP
+    buffered = io.BytesIO()
+    img.save(buffered, format="PNG")
+    img_str = base64.b64encode(buffered.getvalue()).decode('utf-8')
+    return {"json": {"image_data": img_str}}
 
-        # Send the base64 encoded image
-        payload = {"image_data": img_str}
-        response = requests.post(MODEL_SERVICE_URL, json=payload, timeout=5)
-        response.raise_for_status()
 
-        prediction = response.json()
+def retry_delay(
+    response: httpx.Response,
+    attempt: int,
+    backoff: float = MODEL_SERVICE_BACKOFF,
+    max_wait: float = MODEL_SERVICE_MAX_RETRY_WAIT,
+) -> Optional[float]:
+    """
+    Seconds to wait before retrying a response, or None if it should not
+    be retried. Only 503s are retried, after their Retry-After (in
+    seconds or as an HTTP date) if given.
+    """
+    if response.status_code != 503:
+        return None
+    delay = backoff * 2 ** attempt
+    retry_after = response.headers.get("Retry-After")
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = (parsedate_to_datetime(retry_after).timestamp() -
+                         time.time())
+            except (TypeError, ValueError):
+                pass
+    delay = max(0.0, delay)
+    return delay if delay <= max_wait else None
 
-        # Convert confidence values to percentages
-        if "confidence" in prediction:
-            prediction["confidence"] = {k: v * 100 for k, v in prediction[
-                "confidence"
-            ].items()}
 
-        return prediction
+def parse_prediction(response: httpx.Response) -> dict:
+    response.raise_for_status()
+    prediction = response.json()
 
-    except requests.exceptions.RequestException as e:
-        # Return an error dictionary
-        return {
-            "error": f"Failed to get prediction: {e}",
-            "confidence": {},
-            "prediction": "Error"
-        }
-    except Exception as e:
-        # Handle other exceptions (like image processing errors)
-        return {
-            "error": f"Error processing image: {e}",
-            "confidence": {},
-            "prediction": "Error"
+    # Convert confidence values to percentages
+    if "confidence" in prediction:
+        prediction["confidence"] = {k: v * 100 for k, v in prediction[
+            "confidence"
+        ].items()}
+
+    return prediction
+
+
+def error_result(e: Exception) -> dict:
+    if isinstance(e, httpx.HTTPError):
+        error = f"Failed to get prediction: {e}"
+    else:
+        # Like image processing errors
+        error = f"Error processing image: {e}"
+    return {"error": error, "confidence": {}, "prediction": "Error"}
+
+
+class BasePredictionClient:
+    """
+    Connection pooling, keep-alive and retry settings shared by the sync
+    and async model service clients.
+    """
+
+    def __init__(
+        self,
+        url: str = MODEL_SERVICE_URL,
+        timeout: float = MODEL_SERVICE_TIMEOUT,
+        max_connections: int = MODEL_SERVICE_MAX_CONNECTIONS,
+        max_keepalive: int = MODEL_SERVICE_MAX_KEEPALIVE,
+        retries: int = MODEL_SERVICE_RETRIES,
+        backoff: float = MODEL_SERVICE_BACKOFF,
+        max_retry_wait: float = MODEL_SERVICE_MAX_RETRY_WAIT,
+        http2: bool = MODEL_SERVICE_HTTP2,
+        transport=None,
+    ):
+        self.url = url
+        self.retries = retries
+        self.backoff = backoff
+        self.max_retry_wait = max_retry_wait
+        self.client_options = {
+            "timeout": timeout,
+            "limits": httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+            ),
+            "http2": http2,
+            "transport": transport,
         }
+
+    def _retry_delay(self, response, attempt) -> Optional[float]:
+        if attempt >= self.retries:
+            return None
+        return retry_delay(
+            response, attempt, self.backoff, self.max_retry_wait)
+
+
+class PredictionClient(BasePredictionClient):
+    """
+    Thread-safe model service client that reuses pooled keep-alive
+    connections across requests.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.client = httpx.Client(**self.client_options)
+
+    def post(self, **request) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = self.client.post(self.url, **request)
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return response
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def predict(self, image_data, raw: bool = MODEL_SERVICE_RAW_INPUT):
+        """
+        Classify canvas image data. Returns the prediction result as a
+        dictionary, or one with an 'error' key if the request failed.
+        """
+        try:
+            return parse_prediction(
+                self.post(**encode_image(image_data, raw)))
+        except Exception as e:
+            return error_result(e)
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncPredictionClient(BasePredictionClient):
+    """
+    Asyncio model service client for issuing many predictions
+    concurrently over a bounded pool of keep-alive connections.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.client = httpx.AsyncClient(**self.client_options)
+
+    async def post(self, **request) -> httpx.Response:
+        attempt = 0
+        while True:
+            response = await self.client.post(self.url, **request)
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return response
+            await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def predict(self, image_data, raw: bool = MODEL_SERVICE_RAW_INPUT):
+        """
+        Classify canvas image data, like PredictionClient.predict.
+        """
+        try:
+            return parse_prediction(
+                await self.post(**encode_image(image_data, raw)))
+        except Exception as e:
+            return error_result(e)
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+_client: Optional[PredictionClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> PredictionClient:
+    """
+    The process-wide client, created on first use.
+    """
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = PredictionClient()
+        return _client
+
+
+def send_prediction_request(image_data, raw=MODEL_SERVICE_RAW_INPUT) -> dict:
+    """
+    Sends a POST request with the image data to the model service's
+    prediction endpoint, either as base64-encoded PNG JSON or, with `raw`,
+    as the 784 raw grayscale pixel bytes.
+    Returns the prediction result as a dictionary if the request is successful.
+    In case of error, returns a dictionary with an 'error' key.
+    """
+    return get_client().predict(image_data, raw)
@@ -1,26 +1,241 @@
+import atexit
 import logging
-from utils.db import execute_query
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+from utils.db import get_connection, return_connection
 
 logger = logging.getLogger(__name__)
 
+# Rows are written once this many are queued, or every FLUSH_INTERVAL
+# seconds, whichever comes first
+BATCH_SIZE = int(os.environ.get("PREDICTION_LOG_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.environ.get("PREDICTION_LOG_FLUSH_INTERVAL", "1.0"))
+MAX_QUEUED = int(os.environ.get("PREDICTION_LOG_MAX_QUEUED", "10000"))
+
+COPY_PREDICTIONS = """
+COPY predictions (predicted_digit, confidence_score, true_label)
+FROM STDIN
+"""
+
+Row = Tuple[int, float, int]
+
+
+class PredictionLogFullError(RuntimeError):
+    """Raised when the prediction log queue cannot accept more rows."""
+
+
+class PredictionWriter:
+    """
+    Buffers prediction rows in a bounded queue and writes them from a
+    background thread with a single COPY per batch, so callers never wait
+    on the database.
+
+    A batch is flushed once `batch_size` rows are queued or
+    `flush_interval` seconds after its first row arrived. Rows from a
+    failed flush are retried on the next one; `close` flushes everything
+    still queued.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_queued: int = MAX_QUEUED,
+        connect: Callable = get_connection,
+        release: Callable = return_connection,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._connect = connect
+        self._release = release
+        self._queue: "queue.Queue[Optional[Row]]" = queue.Queue(max_queued)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition()
+        self._retry: List[Row] = []
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="prediction-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, row: Row) -> int:
+        """
+        Queue a row for writing without blocking. Returns its sequence
+        number: rows are written or dropped in order, so it is settled
+        once `settled` reaches that number.
+
+        Raises:
+            PredictionLogFullError: If the queue is at capacity
+        """
+        self.start()
+        with self._lock:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                raise PredictionLogFullError(
+                    "Prediction log queue is full; the database may be down")
+            self.submitted += 1
+            return self.submitted
+
+    @property
+    def settled(self) -> int:
+        """
+        Rows that will not be written again: written, or dropped after
+        too many failed flushes or on shutdown.
+        """
+        return self.written + self.dropped
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until every row queued so far has been written. Returns False
+        if that did not happen within `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self._flushed:
+            while self._queue.unfinished_tasks or self._retry:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._flushed.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 10.0):
+        """
+        Write all queued rows and stop the background thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                logger.error("Prediction writer did not drain in time")
+                return
+            thread.join(timeout)
+
+    def _next_batch(self) -> Tuple[List[Row], bool]:
+        batch, stopping = [], False
+        # With rows waiting to be retried, wait at most one interval
+        try:
+            row = self._queue.get(
+                timeout=self.flush_interval if self._retry else None)
+        except queue.Empty:
+            return batch, stopping
+        deadline = time.monotonic() + self.flush_interval
+        while row is not None:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                break
+            try:
+                row = self._queue.get(
+                    timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        else:
+            stopping = True
+            self._queue.task_done()
+        return batch, stopping
+
+    def _run(self):
+        while True:
+            batch, stopping = self._next_batch()
+            self._write(self._retry + batch)
+            for _ in batch:
+                self._queue.task_done()
+            with self._flushed:
+                self._flushed.notify_all()
+            if stopping:
+                if self._retry:
+                    self.dropped += len(self._retry)
+                    logger.error("Dropped %d prediction rows on shutdown",
+                                 len(self._retry))
+                return
+
+    def _write(self, rows: List[Row]):
+        if not rows:
+            self._retry = []
+            return
+        conn = None
+        try:
+            conn = self._connect()
+            with conn.cursor() as cur:
+                with cur.copy(COPY_PREDICTIONS) as copy:
+                    for row in rows:
+                        copy.write_row(row)
+            conn.commit()
+        except Exception as e:
+            self.failed_flushes += 1
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            # Keep at most a queue's worth of rows for the next attempt,
+            # dropping the oldest
+            self._retry = rows[-self._queue.maxsize:]
+            self.dropped += len(rows) - len(self._retry)
+            logger.error("Failed to write %d prediction rows: %s",
+                         len(rows), e)
+            return
+        finally:
+            if conn is not None:
+                self._release(conn)
+        self._retry = []
+        self.written += len(rows)
+        logger.info("Logged %d predictions", len(rows))
+
+
+_writer = PredictionWriter()
+atexit.register(_writer.close)
+
 
 def log_prediction(
     predicted_digit: int,
     confidence_score: float,
     true_label: int
-):
-    """
-    Logs a prediction result to the predictions table in the database.
-    """
-    query = """
-    INSERT INTO predictions (predicted_digit, confidence_score, true_label)
-    VALUES (%s, %s, %s)
-    """
-    params = (predicted_digit, confidence_score, true_label)
-    try:
-        execute_query(query, params)
-        logger.info("Logged prediction: %s, %s, %s",
-                    predicted_digit, confidence_score, true_label)
-    except Exception as e:
-        logger.error("Failed to log prediction: %s", e)
-        raise
+) -> int:
+    """
+    Queues a prediction result for the predictions table in the database.
+    Rows are written in the background in batches. Returns the row's
+    sequence number, which predictions_settled() reaches once the row is
+    in the table or has been dropped.
+
+    Raises:
+        PredictionLogFullError: If too many rows are waiting to be written
+    """
+    _writer.submit((predicted_digit, confidence_score, true_label))
+
+
+def flush_predictions(timeout: float = 5.0) -> bool:
+    """
+    Wait for queued predictions to be written, e.g. before reading them
+    back.
+    """
+    return _writer.flush(timeout)
+
+
+def predictions_written() -> int:
+    """
+    Number of predictions this process has written so far.
+    """
+    return _writer.written
+
+
+def predictions_settled() -> int:
+    """
+    Number of predictions this process has written or given up on, in
+    the order they were logged. It changes whenever new rows land, so it
+    can key caches of prediction queries.
+    """
+    return _writer.settled
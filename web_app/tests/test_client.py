@@ -0,0 +1,112 @@
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+import httpx
+import numpy as np
+
+# Add web_app/src to the path so the app's `utils` package is importable
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../src')))
+
+from utils.client import (  # noqa: E402
+    AsyncPredictionClient,
+    PredictionClient,
+    retry_delay
+)
+
+PREDICTION = {"prediction": "3", "confidence": {"3": 0.9, "5": 0.1}}
+
+
+def busy(retry_after="1"):
+    return httpx.Response(503, headers={"Retry-After": retry_after})
+
+
+class TestRetryDelay(unittest.TestCase):
+    def test_only_service_unavailable_is_retried(self):
+        self.assertIsNone(retry_delay(httpx.Response(500), 0))
+        self.assertIsNone(retry_delay(httpx.Response(200), 0))
+
+    def test_retry_after_seconds_are_honoured(self):
+        self.assertEqual(retry_delay(busy("2"), 0, max_wait=5), 2.0)
+
+    def test_backoff_without_retry_after(self):
+        response = httpx.Response(503)
+        self.assertEqual(retry_delay(response, 0, backoff=0.5), 0.5)
+        self.assertEqual(retry_delay(response, 2, backoff=0.5), 2.0)
+
+    def test_long_retry_after_is_not_waited_for(self):
+        self.assertIsNone(retry_delay(busy("300"), 0, max_wait=5))
+
+
+class TestPredictionClient(unittest.TestCase):
+    def setUp(self):
+        self.image = np.zeros((280, 280, 4), dtype=np.uint8)
+        sleep = patch('utils.client.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def make_client(self, responses, **kwargs):
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            return responses.pop(0)
+
+        client = PredictionClient(
+            transport=httpx.MockTransport(handler), **kwargs)
+        self.addCleanup(client.close)
+        return client
+
+    def test_prediction_confidence_is_in_percent(self):
+        client = self.make_client([httpx.Response(200, json=PREDICTION)])
+        result = client.predict(self.image, raw=False)
+        self.assertEqual(result["prediction"], "3")
+        self.assertAlmostEqual(result["confidence"]["3"], 90.0)
+        self.assertIn(b"image_data", self.requests[0].content)
+
+    def test_raw_pixels_are_sent_as_octet_stream(self):
+        client = self.make_client([httpx.Response(200, json=PREDICTION)])
+        client.predict(self.image, raw=True)
+        request = self.requests[0]
+        self.assertEqual(request.headers["Content-Type"],
+                         "application/octet-stream")
+        self.assertEqual(len(request.content), 28 * 28)
+
+    def test_busy_service_is_retried_after_retry_after(self):
+        client = self.make_client(
+            [busy("1"), httpx.Response(200, json=PREDICTION)], retries=2)
+        result = client.predict(self.image)
+        self.assertEqual(result["prediction"], "3")
+        self.assertEqual(len(self.requests), 2)
+        self.sleep.assert_called_once_with(1.0)
+
+    def test_gives_up_after_retries(self):
+        client = self.make_client([busy(), busy(), busy()], retries=2)
+        result = client.predict(self.image)
+        self.assertEqual(result["prediction"], "Error")
+        self.assertIn("503", result["error"])
+        self.assertEqual(len(self.requests), 3)
+
+
+class TestAsyncPredictionClient(unittest.TestCase):
+    def test_concurrent_predictions_share_the_client(self):
+        responses = [busy("0"), httpx.Response(200, json=PREDICTION)]
+        responses += [httpx.Response(200, json=PREDICTION)] * 3
+        image = np.zeros((280, 280, 4), dtype=np.uint8)
+
+        async def run():
+            client = AsyncPredictionClient(
+                transport=httpx.MockTransport(lambda r: responses.pop(0)))
+            async with client:
+                return await asyncio.gather(
+                    *(client.predict(image) for _ in range(4)))
+
+        results = asyncio.run(run())
+        self.assertEqual([r["prediction"] for r in results], ["3"] * 4)
+        self.assertEqual(responses, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+import psycopg
+
+# Add web_app/src to the path so the app's `utils` package is importable
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../src')))
+
+from utils.db import (  # noqa: E402
+    ConnectionPool,
+    PoolTimeoutError,
+    estimate_prediction_count,
+    fetch_confusion_matrix,
+    fetch_digit_accuracy,
+    fetch_hourly_accuracy,
+    fetch_predictions_page,
+    get_pool,
+    init_db,
+    use_pool
+)
+
+
+def make_conn(*args):
+    conn = MagicMock(closed=False, broken=False)
+    conn.info.transaction_status = psycopg.pq.TransactionStatus.IDLE
+    return conn
+
+
+class TestConnectionPool(unittest.TestCase):
+    def make_pool(self, **kwargs):
+        self.connect = MagicMock(side_effect=make_conn)
+        options = dict(min_size=1, max_size=2, timeout=0.2,
+                       check_interval=0)
+        options.update(kwargs)
+        pool = ConnectionPool("dsn", connect=self.connect, **options)
+        pool.open()
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_pool_is_bounded_and_times_out(self):
+        pool = self.make_pool()
+        first, second = pool.getconn(), pool.getconn()
+        self.assertIsNot(first, second)
+        with self.assertRaises(PoolTimeoutError):
+            pool.getconn()
+
+        stats = pool.stats()
+        self.assertEqual(stats["creations"], 2)
+        self.assertEqual(stats["timeouts"], 1)
+        self.assertEqual(stats["in_use"], 2)
+
+    def test_waiter_receives_returned_connection(self):
+        pool = self.make_pool(max_size=1, timeout=5)
+        conn = pool.getconn()
+        threading.Timer(0.05, pool.putconn, [conn]).start()
+
+        self.assertIs(pool.getconn(), conn)
+        stats = pool.stats()
+        self.assertEqual(stats["waits"], 1)
+        self.assertEqual(stats["creations"], 1)
+
+    def test_returns_do_not_ping_the_server(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        conn.execute.assert_not_called()
+
+    def test_broken_connection_is_discarded(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        conn.broken = True
+        pool.putconn(conn)
+
+        conn.close.assert_called_once()
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertEqual(pool.stats()["discards"], 1)
+
+    def test_health_check_replaces_dead_idle_connections(self):
+        pool = self.make_pool(min_size=2, check_interval=60)
+        for conn, _ in pool._idle:
+            conn.execute.side_effect = psycopg.OperationalError("gone")
+        pool.check_interval = 0
+        pool._check_idle()
+
+        stats = pool.stats()
+        self.assertEqual(stats["health_check_failures"], 2)
+        self.assertEqual(stats["idle"], 2)
+        self.assertEqual(stats["creations"], 4)
+
+    def test_surplus_idle_connections_are_closed(self):
+        pool = self.make_pool(min_size=1, max_size=3, check_interval=60)
+        conns = [pool.getconn() for _ in range(3)]
+        for conn in conns:
+            pool.putconn(conn)
+        pool.check_interval = 0
+        pool._check_idle()
+
+        stats = pool.stats()
+        self.assertEqual((stats["size"], stats["idle"]), (1, 1))
+        self.assertEqual(stats["discards"], 2)
+
+    def test_connection_pinged_during_close_is_closed(self):
+        pool = self.make_pool(min_size=1, check_interval=60)
+        (conn, _), = pool._idle
+        conn.execute.side_effect = lambda query: pool.close()
+        pool.check_interval = 0
+        pool._check_idle()
+
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats()["idle"], 0)
+
+    def test_connection_returned_after_close_is_closed(self):
+        pool = self.make_pool()
+        conn = pool.getconn()
+        pool.close()
+        pool._add_idle(conn)
+
+        conn.close.assert_called_once()
+        self.assertEqual(pool.stats()["size"], 0)
+
+
+class TestModulePool(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(use_pool, None)
+
+    def test_installed_pool_is_reused(self):
+        pool = MagicMock()
+        use_pool(pool)
+        self.assertIs(init_db(), pool)
+        self.assertIs(get_pool(), pool)
+
+    @patch('utils.db.ConnectionPool')
+    def test_pool_is_opened_once(self, mock_pool):
+        use_pool(None)
+        self.assertIs(init_db(), init_db())
+        mock_pool.return_value.open.assert_called_once()
+
+
+class TestHistoryQueries(unittest.TestCase):
+    @patch('utils.db.execute_query')
+    def test_next_page_continues_after_cursor(self, mock_execute):
+        cursor = (datetime(2025, 4, 1, 12, 0), 42)
+        fetch_predictions_page(20, before=cursor)
+
+        query, params = mock_execute.call_args.args
+        self.assertIn("(timestamp, id) < (%s, %s)", query)
+        self.assertIn("ORDER BY timestamp DESC, id DESC", query)
+        self.assertNotIn("*", query)
+        self.assertEqual(params, (*cursor, 20))
+
+    @patch('utils.db.execute_query')
+    def test_count_uses_estimate_for_large_tables(self, mock_execute):
+        mock_execute.return_value = [(2_500_000,)]
+        self.assertEqual(estimate_prediction_count(), 2_500_000)
+        self.assertEqual(mock_execute.call_count, 1)
+
+    @patch('utils.db.execute_query')
+    def test_count_is_exact_for_unanalysed_tables(self, mock_execute):
+        mock_execute.side_effect = [[(-1,)], [(7,)]]
+        self.assertEqual(estimate_prediction_count(), 7)
+
+
+class TestAccuracyQueries(unittest.TestCase):
+    @patch('utils.db.execute_query')
+    def test_queries_read_only_the_rollup(self, mock_execute):
+        mock_execute.return_value = []
+        fetch_hourly_accuracy()
+        fetch_digit_accuracy()
+        fetch_confusion_matrix()
+        for call in mock_execute.call_args_list:
+            self.assertIn("FROM predictions_hourly", call.args[0])
+            self.assertNotIn("WHERE", call.args[0])
+            self.assertEqual(call.args[1], ())
+
+    @patch('utils.db.execute_query')
+    def test_since_bounds_the_rollup_hours(self, mock_execute):
+        mock_execute.return_value = []
+        since = datetime(2025, 1, 1, 12, 30)
+        fetch_hourly_accuracy(since)
+        query, params = mock_execute.call_args.args
+        self.assertIn("WHERE hour >=", query)
+        self.assertEqual(params, (since,))
+
+    @patch('utils.db.execute_query')
+    def test_confusion_matrix_is_indexed_by_true_label(self, mock_execute):
+        mock_execute.return_value = [(3, 3, 5), (3, 8, 2), (7, 1, 1)]
+        matrix = fetch_confusion_matrix()
+        self.assertEqual(len(matrix), 10)
+        self.assertEqual(matrix[3][3], 5)
+        self.assertEqual(matrix[3][8], 2)
+        self.assertEqual(matrix[7][1], 1)
+        self.assertEqual(sum(map(sum, matrix)), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+# Add web_app/src to the path so the app's `utils` package is importable
+sys.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '../src')))
+
+from utils.prediction_logger import (  # noqa: E402
+    PredictionLogFullError,
+    PredictionWriter
+)
+
+
+class TestPredictionWriter(unittest.TestCase):
+    def setUp(self):
+        self.mock_conn = MagicMock()
+        self.mock_copy = (
+            self.mock_conn.cursor.return_value.__enter__.return_value
+            .copy.return_value.__enter__.return_value
+        )
+        self.release = MagicMock()
+
+    def make_writer(self, **kwargs):
+        writer = PredictionWriter(
+            connect=lambda: self.mock_conn, release=self.release, **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def written_rows(self):
+        return [c.args[0] for c in self.mock_copy.write_row.call_args_list]
+
+    def test_rows_are_copied_in_batches(self):
+        writer = self.make_writer(batch_size=3, flush_interval=5)
+        rows = [(i, 0.5, i) for i in range(6)]
+        for row in rows:
+            writer.submit(row)
+
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(self.written_rows(), rows)
+        self.assertEqual(self.mock_conn.commit.call_count, 2)
+        self.assertEqual(self.release.call_count, 2)
+
+    def test_written_count_advances_after_each_write(self):
+        writer = self.make_writer(batch_size=2, flush_interval=5)
+        self.assertEqual(writer.written, 0)
+        writer.submit((1, 0.9, 1))
+        writer.submit((2, 0.4, 7))
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(writer.written, 2)
+
+    def test_rows_are_written_once_count_reaches_their_number(self):
+        blocked = threading.Event()
+        self.mock_conn.commit.side_effect = lambda: blocked.wait(5)
+        writer = self.make_writer(batch_size=1, flush_interval=5)
+        first = writer.submit((1, 0.9, 1))
+        second = writer.submit((2, 0.4, 7))
+        self.assertEqual((first, second), (1, 2))
+        self.assertLess(writer.written, second)
+
+        blocked.set()
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertGreaterEqual(writer.written, second)
+
+    def test_partial_batch_is_flushed_after_interval(self):
+        writer = self.make_writer(batch_size=100, flush_interval=0.05)
+        writer.submit((1, 0.9, 1))
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(self.written_rows(), [(1, 0.9, 1)])
+
+    def test_close_writes_queued_rows(self):
+        writer = self.make_writer(batch_size=100, flush_interval=60)
+        writer.submit((2, 0.8, 3))
+        writer.close()
+        self.assertEqual(self.written_rows(), [(2, 0.8, 3)])
+
+    def test_failed_flush_is_retried(self):
+        writer = self.make_writer(batch_size=1, flush_interval=0.01)
+        self.mock_conn.commit.side_effect = [Exception("db down"), None]
+        writer.submit((4, 0.7, 4))
+
+        self.assertTrue(writer.flush(timeout=5))
+        self.assertEqual(writer.failed_flushes, 1)
+        self.assertEqual(writer.written, 1)
+        self.mock_conn.rollback.assert_called_once()
+
+    def test_dropped_rows_still_settle(self):
+        self.mock_conn.commit.side_effect = Exception("db down")
+        writer = self.make_writer(
+            batch_size=2, flush_interval=0.01, max_queued=2)
+        for row in ((1, 0.9, 1), (2, 0.4, 7)):
+            writer.submit(row)
+        self.assertFalse(writer.flush(timeout=0.2))
+        for row in ((3, 0.6, 3), (4, 0.7, 4)):
+            writer.submit(row)
+        writer.close()
+
+        self.assertEqual(writer.written, 0)
+        self.assertEqual(writer.dropped, 4)
+        self.assertEqual(writer.settled, writer.submitted)
+
+    def test_full_queue_rejects_rows_without_blocking(self):
+        blocked = threading.Event()
+        self.mock_conn.commit.side_effect = lambda: blocked.wait(5)
+        writer = self.make_writer(batch_size=1, max_queued=1)
+        with self.assertRaises(PredictionLogFullError):
+            for i in range(3):
+                writer.submit((i, 0.5, i))
+        blocked.set()
+
+
+if __name__ == '__main__':
+    unittest.main()